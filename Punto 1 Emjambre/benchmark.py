@@ -0,0 +1,163 @@
+"""
+Benchmarks del simulador de formaciones (main.py)
+- Barre el número de drones N (40 -> 50k)
+- Mide: pasos/s de DroneSwarm3D.step, latencia de asignación (greedy / optimal / knn),
+  cdist_np, frames/s de render headless y memoria pico (tracemalloc)
+- Escribe JSON para comparar versiones; --baseline marca regresiones
+
+Uso:
+    python benchmark.py --output bench.json
+    python benchmark.py --sizes 40 1000 --baseline bench.json --tolerance 0.25
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+import main
+
+DEFAULT_SIZES = [40, 200, 1000, 5000, 10000, 50000]
+MIN_SECONDS = 0.5          # repeat each measurement at least this long
+MAX_REPEATS = 200
+
+# size limits for the O(N^2) / dense benchmarks
+LIMITS = {
+    "step_brute": 2000,
+    "assign_greedy": 5000,
+    "assign_optimal": 3000,
+    "cdist": 5000,
+    "render": 10000,
+}
+
+def _measure(fn, setup=None):
+    """Run fn repeatedly for at least MIN_SECONDS. Returns (ops/s, s/op, peak MB).
+       The peak comes from one extra traced call, so tracing does not skew the timing."""
+    state = setup() if setup else None
+    count = 0
+    t0 = time.perf_counter()
+    while True:
+        fn(state)
+        count += 1
+        elapsed = time.perf_counter() - t0
+        if elapsed >= MIN_SECONDS or count >= MAX_REPEATS:
+            break
+    tracemalloc.start()
+    fn(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return count / elapsed, elapsed / count, peak / 2**20
+
+def bench_step(n, mode):
+    targets = main.formation_targets("robot", n)
+
+    def setup():
+        # freeze off: once the swarm converges, frozen drones would make the
+        # timed steps no-ops and the number would not be the real step cost
+        np.random.seed(main.SEED)
+        swarm = main.DroneSwarm3D(n, neighbor_mode=mode, freeze_settled=False)
+        return swarm, swarm.assign(targets, method="knn")
+
+    def run(state):
+        swarm, assigned = state
+        swarm.step(targets, assigned)
+
+    return _measure(run, setup)
+
+def bench_assign(n, method):
+    targets = main.formation_targets("dragon", n)
+    rng = np.random.default_rng(main.SEED)
+    pos = rng.uniform(80, main.AREA_SIZE - 80, (n, 3))
+    stats = {}
+
+    def run(_):
+        assigned = main.assign_targets(pos[:, 0:2], targets[:, 0:2], method)
+        stats.update(main.assignment_stats(pos, targets, assigned))
+
+    ops, sec, peak = _measure(run)
+    return ops, sec, peak, stats
+
+def bench_cdist(n):
+    rng = np.random.default_rng(main.SEED)
+    A = rng.uniform(0, main.AREA_SIZE, (n, 2))
+    return _measure(lambda _: main.cdist_np(A, A))
+
+def bench_render(n, width=640, height=480):
+    phases = main.build_phases(n)
+    main._render_init(width, height, phases)
+    pos = phases[0][1].astype(np.float32)
+    return _measure(lambda _: main._render_frame((0, 0, pos)))
+
+def run_suite(sizes):
+    results = []
+
+    def add(bench, n, ops, sec, peak, **extra):
+        row = {"bench": bench, "n": n, "ops_per_sec": ops, "seconds_per_op": sec,
+               "peak_mem_mb": peak, **extra}
+        results.append(row)
+        print(f"{bench:>15} N={n:>6}: {ops:10.2f} ops/s  {sec*1000:9.2f} ms/op  {peak:8.1f} MB")
+
+    for n in sizes:
+        add("step_grid", n, *bench_step(n, "grid"))
+        if n <= LIMITS["step_brute"]:
+            add("step_brute", n, *bench_step(n, "brute"))
+        for method in ("greedy", "optimal", "knn"):
+            if n <= LIMITS.get(f"assign_{method}", n):
+                ops, sec, peak, stats = bench_assign(n, method)
+                add(f"assign_{method}", n, ops, sec, peak,
+                    total_distance=stats["total_distance"], max_distance=stats["max_distance"])
+        if n <= LIMITS["cdist"]:
+            add("cdist", n, *bench_cdist(n))
+        if n <= LIMITS["render"]:
+            add("render", n, *bench_render(n))
+    return results
+
+def compare(results, baseline, tolerance):
+    """Rows whose throughput dropped more than `tolerance` versus the baseline."""
+    old = {(r["bench"], r["n"]): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        ref = old.get((r["bench"], r["n"]))
+        if ref and r["ops_per_sec"] < ref["ops_per_sec"] * (1.0 - tolerance):
+            regressions.append({"bench": r["bench"], "n": r["n"],
+                                "ops_per_sec": r["ops_per_sec"], "baseline": ref["ops_per_sec"]})
+    return regressions
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks del Drone Light Show")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--output", default="bench.json")
+    parser.add_argument("--baseline", default=None, help="JSON anterior para detectar regresiones")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="caída máxima aceptada de ops/s respecto al baseline")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.sizes)
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "scipy": main._scipy_lsa is not None,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["regressions"] = compare(results, json.load(f), args.tolerance)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados guardados en {args.output}")
+    if report.get("regressions"):
+        for r in report["regressions"]:
+            print(f"REGRESIÓN {r['bench']} N={r['n']}: {r['ops_per_sec']:.2f} vs {r['baseline']:.2f} ops/s")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
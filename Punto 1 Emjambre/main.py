@@ -11,9 +11,12 @@ Drone Light Show — puntos embebidos (no lee imágenes)
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
-from matplotlib import cm
+import hashlib
 import math
+import os
 import random
+import time
+import zlib
 
 # -----------------------------
 # Config
@@ -29,20 +32,24 @@ TOTAL_PHASE_FRAMES = FRAMES_PER_PHASE + HOLD_FRAMES
 DT = 1.0
 MAX_SPEED = 18.0
 SAFE_DISTANCE = 10.0
+CONVERGE_TOL = SAFE_DISTANCE * 0.5   # max position error for a phase to count as formed
+SETTLE_POS_TOL = 1.5                 # a drone is settled below this error...
+SETTLE_SPEED = 0.5                   # ...and this speed; settled drones are frozen
+FREEZE_SETTLED = True                # skip settled drones in step()
+EARLY_PHASE_END = False              # end a phase HOLD_FRAMES after the whole swarm settled
 SEED = 42
 
 np.random.seed(SEED)
 random.seed(SEED)
 
 # GIF export options
-SAVE_GIF = True
 GIF_FILENAME = "emjambre.gif"
 GIF_FPS = int(1000 / INTERVAL_MS)
 
 # Colors
 COLOR_ROBOT = "#7fb3ff"
 COLOR_DRAGON = "#ff4d4d"
-CMAP_RAINBOW = cm.get_cmap("hsv", N_DRONES)
+CMAP_RAINBOW = plt.get_cmap("hsv", N_DRONES)
 
 # -----------------------------
 # Utilities: distance matrix
@@ -82,107 +89,528 @@ def greedy_unique_assign(positions, targets):
     return assigned
 
 # -----------------------------
-# Figure generators (30 contour + 10 fill)
+# Assignment engine (greedy / optimal / knn)
 # -----------------------------
-def build_points(contour_pts, n_contour=30, n_fill=10):
-    """Given contour points (Nx2), pick n_contour roughly evenly along contour
-       and generate n_fill interior points by random barycentric combinations."""
+# SciPy is optional: it gives a C Jonker-Volgenant solver and a KD-tree.
+# Without it we fall back to pure NumPy versions of both.
+try:
+    from scipy.optimize import linear_sum_assignment as _scipy_lsa
+except ImportError:
+    _scipy_lsa = None
+try:
+    from scipy.spatial import cKDTree as _cKDTree
+except ImportError:
+    _cKDTree = None
+
+ASSIGN_METHOD = "auto"          # "greedy" | "optimal" | "knn" | "auto"
+ASSIGN_KNN = 16                 # candidate targets per drone in "knn" mode
+OPTIMAL_MAX_CELLS = 1_000_000   # "auto" uses the dense optimal solver up to ~1000x1000
+KNN_EXACT_CELLS = 250_000       # knn: leftover drones x free targets solved exactly below this
+KNN_LEAF = 256                  # knn: leaf size of the bisection used for larger leftovers
+KNN_CHUNK = 1024                # rows per block for the brute-force kNN fallback
+
+def _hungarian(C):
+    """Min-cost assignment for a dense (n x m) cost matrix with n <= m.
+       Shortest augmenting path (Jonker-Volgenant style) with the inner
+       column scan vectorized in NumPy. Returns the column for each row."""
+    n, m = C.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=int)      # p[j]: row (1-based) holding column j
+    way = np.zeros(m + 1, dtype=int)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = ~used[1:]
+            cur = C[i0 - 1] - u[i0] - v[1:]
+            better = free & (cur < minv[1:])
+            minv[1:][better] = cur[better]
+            way[1:][better] = j0
+            masked = np.where(free, minv[1:], np.inf)
+            j1 = int(np.argmin(masked)) + 1
+            delta = masked[j1 - 1]
+            used_cols = np.nonzero(used)[0]
+            u[p[used_cols]] += delta
+            v[used_cols] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        # augment along the alternating path
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    cols = np.full(n, -1, dtype=int)
+    taken = np.nonzero(p[1:])[0]
+    cols[p[1:][taken] - 1] = taken
+    return cols
+
+def _solve_dense(C):
+    """Optimal rectangular assignment; returns the column per row (-1 if none)."""
+    M, K = C.shape
+    if _scipy_lsa is not None:
+        rows, cols = _scipy_lsa(C)
+        out = -np.ones(M, dtype=int)
+        out[rows] = cols
+        return out
+    if M <= K:
+        return _hungarian(C)
+    # more rows than columns: solve the transpose and invert it
+    row_of_col = _hungarian(C.T)
+    out = -np.ones(M, dtype=int)
+    out[row_of_col] = np.arange(K)
+    return out
+
+def optimal_assign(positions, targets):
+    """Minimum total distance assignment (Hungarian / Jonker-Volgenant).
+       Drones left over when there are fewer targets than drones share
+       their nearest target, as in greedy_unique_assign."""
+    M = len(positions)
+    K = len(targets)
+    assigned = -np.ones(M, dtype=int)
+    if K == 0:
+        return assigned
+    D = cdist_np(positions, targets)
+    assigned = _solve_dense(D)
+    left = assigned == -1
+    if np.any(left):
+        assigned[left] = np.argmin(D[left], axis=1)
+    return assigned
+
+def knn_query(points, queries, k):
+    """k nearest points for every query -> (dist, idx), both (len(queries), k),
+       sorted by distance. Uses a KD-tree when SciPy is present, otherwise a
+       blocked brute-force search that keeps memory at KNN_CHUNK x len(points)."""
+    points = np.asarray(points, dtype=float)
+    queries = np.asarray(queries, dtype=float)
+    k = min(k, len(points))
+    if _cKDTree is not None:
+        dist, idx = _cKDTree(points).query(queries, k=k)
+        return dist.reshape(len(queries), k), idx.reshape(len(queries), k)
+    dist = np.empty((len(queries), k))
+    idx = np.empty((len(queries), k), dtype=int)
+    for s in range(0, len(queries), KNN_CHUNK):
+        D = cdist_np(queries[s:s+KNN_CHUNK], points)
+        part = np.argpartition(D, k - 1, axis=1)[:, :k] if k < D.shape[1] else np.tile(np.arange(k), (len(D), 1))
+        pd = np.take_along_axis(D, part, axis=1)
+        order = np.argsort(pd, axis=1)
+        idx[s:s+KNN_CHUNK] = np.take_along_axis(part, order, axis=1)
+        dist[s:s+KNN_CHUNK] = np.take_along_axis(pd, order, axis=1)
+    return dist, idx
+
+def _propose_rounds(pending, dist, cand, taken, assigned):
+    """Proposal rounds over fixed candidate lists (rows aligned with pending):
+       each drone proposes its closest free candidate, each target keeps its
+       closest proposer. Stops when no pending drone has a free candidate."""
+    rows = np.arange(len(pending))
+    while rows.size:
+        free = ~taken[cand[rows]]
+        has = free.any(axis=1)
+        rows = rows[has]
+        if rows.size == 0:
+            break
+        first = np.argmax(free[has], axis=1)
+        t = cand[rows, first]
+        d = dist[rows, first]
+        order = np.lexsort((d, t))
+        t_sorted = t[order]
+        win = np.ones(len(order), dtype=bool)
+        win[1:] = t_sorted[1:] != t_sorted[:-1]
+        assigned[pending[rows[order[win]]]] = t_sorted[win]
+        taken[t_sorted[win]] = True
+        lost = np.ones(len(rows), dtype=bool)
+        lost[order[win]] = False
+        rows = rows[lost]
+
+def _bisection_assign(positions, targets, drones, free_t, leaf=KNN_LEAF):
+    """Recursive coordinate bisection: split drones at the median of the
+       widest axis, split the free targets along the same axis in the same
+       proportion, and solve each leaf exactly. O(n log n) and balanced, so it
+       handles the drones the kNN rounds could not place."""
+    out_d, out_t = [], []
+    stack = [(drones, free_t)]
+    while stack:
+        d, t = stack.pop()
+        if len(d) == 0 or len(t) == 0:
+            continue
+        if len(d) <= leaf or len(t) <= leaf:
+            sub = _solve_dense(cdist_np(positions[d], targets[t]))
+            ok = sub != -1
+            out_d.append(d[ok]); out_t.append(t[sub[ok]])
+            continue
+        both = np.vstack([positions[d], targets[t]])
+        axis = int(np.argmax(both.max(axis=0) - both.min(axis=0)))
+        d = d[np.argsort(positions[d, axis], kind="stable")]
+        t = t[np.argsort(targets[t, axis], kind="stable")]
+        m1 = len(d) // 2
+        k1 = int(round(m1 * len(t) / len(d)))
+        stack.append((d[:m1], t[:k1]))
+        stack.append((d[m1:], t[k1:]))
+    if not out_d:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+    return np.concatenate(out_d), np.concatenate(out_t)
+
+def knn_assign(positions, targets, k=ASSIGN_KNN):
+    """Approximate unique assignment restricted to the k nearest targets.
+       Every round, each unassigned drone proposes its closest free candidate
+       and each target keeps its closest proposer. Drones that run out of
+       candidates are matched to the targets still free, exactly when the
+       remainder is small and by recursive bisection otherwise."""
+    M = len(positions)
+    K = len(targets)
+    assigned = -np.ones(M, dtype=int)
+    if K == 0 or M == 0:
+        return assigned
+    taken = np.zeros(K, dtype=bool)
+    pending = np.arange(M)
+    dist, cand = knn_query(targets, positions, k)
+    _propose_rounds(pending, dist, cand, taken, assigned)
+    pending = np.nonzero(assigned == -1)[0]
+    free_t = np.nonzero(~taken)[0]
+    if pending.size and free_t.size:
+        if pending.size * free_t.size <= KNN_EXACT_CELLS:
+            sub = _solve_dense(cdist_np(positions[pending], targets[free_t]))
+            ok = sub != -1
+            assigned[pending[ok]] = free_t[sub[ok]]
+        else:
+            d, t = _bisection_assign(positions, targets, pending, free_t)
+            assigned[d] = t
+    left = np.nonzero(assigned == -1)[0]
+    if left.size:
+        # more drones than targets: share the nearest one
+        assigned[left] = cand[left, 0]
+    return assigned
+
+ASSIGNERS = {
+    "greedy": greedy_unique_assign,
+    "optimal": optimal_assign,
+    "knn": knn_assign,
+}
+
+def assign_targets(positions, targets, method=ASSIGN_METHOD):
+    """Dispatch to one of ASSIGNERS; "auto" picks the dense optimal solver
+       for small problems and the kNN approximation for large ones."""
+    if method == "auto":
+        method = "optimal" if len(positions) * len(targets) <= OPTIMAL_MAX_CELLS else "knn"
+    if method not in ASSIGNERS:
+        raise ValueError(f"Unknown assignment method: {method!r}")
+    return ASSIGNERS[method](positions, targets)
+
+def assignment_stats(positions, targets, assigned):
+    """Travel distance summary of an assignment (3D straight-line distances)."""
+    valid = assigned >= 0
+    if not np.any(valid):
+        return {"total_distance": 0.0, "max_distance": 0.0, "mean_distance": 0.0, "shared_targets": 0}
+    d = np.linalg.norm(targets[assigned[valid]] - positions[valid], axis=1)
+    return {
+        "total_distance": float(d.sum()),
+        "max_distance": float(d.max()),
+        "mean_distance": float(d.mean()),
+        "shared_targets": int(valid.sum() - len(np.unique(assigned[valid]))),
+    }
+
+# -----------------------------
+# Formation library (any N: contour by arc length + interior fill)
+# -----------------------------
+FILL_RATIO = 0.25                 # 40 drones -> 30 contour + 10 fill
+FORMATION_VERSION = 1             # bump when a generator changes (invalidates the cache)
+FORMATION_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".formation_cache")
+
+def sample_contour(loops, n):
+    """n points evenly spaced by arc length over a list of (pts Nx2, closed)
+       polylines. Points are shared between loops in proportion to their length."""
+    segs = []
+    for pts, closed in loops:
+        pts = np.asarray(pts, dtype=float)
+        if closed:
+            pts = np.vstack([pts, pts[:1]])
+        segs.append(pts)
+    lengths = [np.r_[0.0, np.cumsum(np.linalg.norm(np.diff(p, axis=0), axis=1))] for p in segs]
+    total = sum(l[-1] for l in lengths)
+    if n <= 0:
+        return np.zeros((0, 2))
+    if total == 0:
+        raise ValueError("Contour empty")
+    # global arc-length positions, then map each to its loop
+    s = (np.arange(n) + 0.5) * (total / n)
+    out = np.empty((n, 2))
+    offset = 0.0
+    for pts, l in zip(segs, lengths):
+        sel = (s >= offset) & (s < offset + l[-1])
+        local = s[sel] - offset
+        out[sel, 0] = np.interp(local, l, pts[:, 0])
+        out[sel, 1] = np.interp(local, l, pts[:, 1])
+        offset += l[-1]
+    return out
+
+def fill_points(contour_pts, n, rng):
+    """n interior points as random convex combinations of 3 distinct contour
+       points (vectorized barycentric sampling)."""
     contour_pts = np.asarray(contour_pts)
     L = len(contour_pts)
-    if L == 0:
-        raise ValueError("Contour empty")
-    # sample contour points evenly
-    idxs = np.linspace(0, L-1, n_contour, dtype=int)
-    chosen_contour = contour_pts[idxs % L]
-    # interior fill: pick random convex combos of 3 random contour points
-    fill = []
-    for _ in range(n_fill):
-        a, b, c = contour_pts[np.random.choice(L, 3, replace=False)]
-        r1, r2 = np.random.rand(), np.random.rand()
-        # barycentric-like coords, ensure inside triangle
-        if r1 + r2 > 1:
-            r1, r2 = 1-r1, 1-r2
-        p = (1 - r1 - r2) * a + r1 * b + r2 * c
-        fill.append(p)
-    return np.vstack([chosen_contour, np.array(fill)])  # shape (n_contour+n_fill, 2)
-
-def dragon_points(n_contour=30, n_fill=10, center=(400,500), scale=220):
+    if L < 3:
+        raise ValueError("Contour needs at least 3 points")
+    a = rng.integers(0, L, n)
+    b = (a + rng.integers(1, L, n)) % L
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+    c = rng.integers(0, L - 2, n)
+    c += c >= lo
+    c += c >= hi
+    r1 = rng.random(n)
+    r2 = rng.random(n)
+    # reflect into the triangle
+    flip = r1 + r2 > 1
+    r1[flip], r2[flip] = 1 - r1[flip], 1 - r2[flip]
+    return ((1 - r1 - r2)[:, None] * contour_pts[a] + r1[:, None] * contour_pts[b]
+            + r2[:, None] * contour_pts[c])
+
+def build_points(loops, n_contour=30, n_fill=10, rng=None):
+    """Given contour polylines, pick n_contour points evenly along them and
+       n_fill interior points. Returns (n_contour+n_fill, 2)."""
+    rng = rng if rng is not None else np.random.default_rng()
+    dense = np.vstack([np.asarray(pts, dtype=float) for pts, _ in loops])
+    return np.vstack([sample_contour(loops, n_contour), fill_points(dense, n_fill, rng)])
+
+def dragon_contour(center=(400,500), scale=220, resolution=200):
     cx, cy = center
-    t = np.linspace(0, 4*math.pi, 200)
+    t = np.linspace(0, 4*math.pi, resolution)
     x = cx + scale * np.sin(t) * np.cos(0.5*t)
     y = cy + scale * np.sin(t) * 0.8 + scale*0.15*np.cos(0.2*t)
-    contour = np.vstack([x, y]).T
-    pts2d = build_points(contour, n_contour, n_fill)
-    # add slight z variation later when mapping to 3D
-    return pts2d
+    return [(np.vstack([x, y]).T, False)]
 
-def robot_points(n_contour=30, n_fill=10, center=(500,500), scale=180):
+def robot_contour(center=(500,500), scale=180):
     cx, cy = center
     w, h = scale, int(scale*1.1)
-    # rectangle perimeter points (evenly sampled)
-    perim = []
-    # top edge
-    for t in np.linspace(-w/2, w/2, 40, endpoint=False):
-        perim.append((cx + t, cy + h/2))
-    # right edge
-    for t in np.linspace(h/2, -h/2, 30, endpoint=False):
-        perim.append((cx + w/2, cy + t))
-    # bottom
-    for t in np.linspace(w/2, -w/2, 40, endpoint=False):
-        perim.append((cx + t, cy - h/2))
-    # left
-    for t in np.linspace(-h/2, h/2, 30, endpoint=False):
-        perim.append((cx - w/2, cy + t))
-    perim = np.array(perim)
-    # add head (a smaller rectangle on top center)
+    # rectangle body
+    body = np.array([(cx - w/2, cy + h/2), (cx + w/2, cy + h/2),
+                     (cx + w/2, cy - h/2), (cx - w/2, cy - h/2)])
+    # head (ellipse on top center)
     head_w, head_h = w*0.4, h*0.25
-    hx0 = cx - head_w/2
-    hy0 = cy + h/2
-    head = []
-    for t in np.linspace(0, 2*math.pi, 30, endpoint=False):
-        head.append((cx + (head_w/2)*math.cos(t), hy0 + (head_h/2)*math.sin(t)))
-    contour = np.vstack([perim, head])
-    pts2d = build_points(contour, n_contour, n_fill)
-    return pts2d
-
-def star_points(n_contour=30, n_fill=10, center=(600,500), scale=200):
+    t = np.linspace(0, 2*math.pi, 60, endpoint=False)
+    head = np.vstack([cx + (head_w/2)*np.cos(t), cy + h/2 + (head_h/2)*np.sin(t)]).T
+    return [(body, True), (head, True)]
+
+def star_contour(center=(600,500), scale=200):
     cx, cy = center
     # 5-point star outer/inner
-    pts = []
-    outer = scale
-    inner = scale * 0.43
-    for i in range(10):
-        ang = 2*math.pi*i/10
-        r = outer if i%2==0 else inner
-        pts.append((cx + r*math.cos(ang), cy + r*math.sin(ang)))
-    contour = np.array(pts)
-    pts2d = build_points(contour, n_contour, n_fill)
-    return pts2d
+    i = np.arange(10)
+    r = np.where(i % 2 == 0, scale, scale * 0.43)
+    ang = 2*math.pi*i/10
+    return [(np.vstack([cx + r*np.cos(ang), cy + r*np.sin(ang)]).T, True)]
+
+def dragon_points(n_contour=30, n_fill=10, center=(400,500), scale=220, rng=None):
+    return build_points(dragon_contour(center, scale, max(200, 2*n_contour)), n_contour, n_fill, rng)
+
+def robot_points(n_contour=30, n_fill=10, center=(500,500), scale=180, rng=None):
+    return build_points(robot_contour(center, scale), n_contour, n_fill, rng)
+
+def star_points(n_contour=30, n_fill=10, center=(600,500), scale=200, rng=None):
+    return build_points(star_contour(center, scale), n_contour, n_fill, rng)
 
 # Map 2D plane points to 3D positions (z small variation)
-def to_3d_from_2d(pts2d, z_base=250, z_variation=8.0):
+def to_3d_from_2d(pts2d, z_base=250, z_variation=8.0, rng=None):
     pts3d = np.zeros((pts2d.shape[0], 3))
     pts3d[:,0:2] = pts2d
-    pts3d[:,2] = z_base + (np.random.randn(pts2d.shape[0]) * z_variation)
+    noise = rng.standard_normal(pts2d.shape[0]) if rng is not None else np.random.randn(pts2d.shape[0])
+    pts3d[:,2] = z_base + noise * z_variation
     # clamp Z
     pts3d[:,2] = np.clip(pts3d[:,2], 20.0, AREA_SIZE*0.6)
     return pts3d
 
-# Build the three target sets (40 points each)
-DRAGON_2D = dragon_points(n_contour=30, n_fill=10, center=(320, 480), scale=240)
-ROBOT_2D  = robot_points(n_contour=30, n_fill=10, center=(500, 480), scale=200)
-STAR_2D   = star_points(n_contour=30, n_fill=10, center=(680, 480), scale=200)
+# name -> (2D generator, shape parameters, z_base, z_variation)
+FORMATIONS = {
+    "dragon": (dragon_points, {"center": (320, 480), "scale": 240}, 240, 6.0),
+    "robot":  (robot_points,  {"center": (500, 480), "scale": 200}, 230, 4.0),
+    "star":   (star_points,   {"center": (680, 480), "scale": 200}, 260, 10.0),
+}
 
-DRAGON_TARGETS = to_3d_from_2d(DRAGON_2D, z_base=240, z_variation=6.0)
-ROBOT_TARGETS  = to_3d_from_2d(ROBOT_2D,  z_base=230, z_variation=4.0)
-STAR_TARGETS   = to_3d_from_2d(STAR_2D,   z_base=260, z_variation=10.0)
+def _formation_key(name, n, seed, params, z_base, z_variation):
+    blob = repr((FORMATION_VERSION, name, n, seed, FILL_RATIO, sorted(params.items()),
+                 z_base, z_variation)).encode()
+    return f"{name}_{n}_{hashlib.sha1(blob).hexdigest()[:16]}"
+
+def generate_formation(name, n=N_DRONES, seed=SEED, **overrides):
+    """3D targets (n, 3) for a named formation, deterministic for (params, seed)."""
+    gen, params, z_base, z_variation = FORMATIONS[name]
+    params = {**params, **overrides}
+    rng = np.random.default_rng([seed, zlib.crc32(name.encode())])
+    n_fill = int(round(n * FILL_RATIO))
+    pts2d = gen(n - n_fill, n_fill, rng=rng, **params)
+    return to_3d_from_2d(pts2d, z_base=z_base, z_variation=z_variation, rng=rng)
+
+def formation_targets(name, n=N_DRONES, seed=SEED, cache_dir=FORMATION_CACHE_DIR, **overrides):
+    """Cached generate_formation: target sets are stored as .npy files keyed by
+       shape parameters and seed, so later runs and worker processes just load
+       them. cache_dir=None disables the cache."""
+    if cache_dir is None:
+        return generate_formation(name, n, seed, **overrides)
+    _, params, z_base, z_variation = FORMATIONS[name]
+    key = _formation_key(name, n, seed, {**params, **overrides}, z_base, z_variation)
+    path = os.path.join(cache_dir, key + ".npy")
+    try:
+        return np.load(path)
+    except (OSError, ValueError):
+        pass
+    pts = generate_formation(name, n, seed, **overrides)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # write-then-rename so concurrent workers never read a partial file
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, pts)
+        os.replace(tmp, path)
+    except OSError:
+        pass   # read-only location: just skip caching
+    return pts
+
+# The three default target sets (N_DRONES points each) and BASE_POSITIONS are
+# built lazily on first access, so importing this module does no work.
+_LAZY_CONSTANTS = {
+    "DRAGON_TARGETS": lambda: formation_targets("dragon"),
+    "ROBOT_TARGETS": lambda: formation_targets("robot"),
+    "STAR_TARGETS": lambda: formation_targets("star"),
+    "BASE_POSITIONS": lambda: compute_base_positions(N_DRONES),
+}
+
+def __getattr__(name):
+    if name in _LAZY_CONSTANTS:
+        value = globals()[name] = _LAZY_CONSTANTS[name]()
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# -----------------------------
+# Neighbor search (uniform hash grid) and repulsion kernel
+# -----------------------------
+NEIGHBOR_MODE = "grid"            # "grid" (near-linear) | "brute" (reference O(N^2) loop)
+REPULSION_RADIUS = SAFE_DISTANCE * 2.0
+
+# 13 "forward" neighbour cells: together with the own cell every pair of
+# adjacent cells is visited exactly once
+_HALF_OFFSETS = np.array([(dx, dy, dz)
+                          for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)
+                          if (dx, dy, dz) > (0, 0, 0)])
+# all 27 cells around (and including) a cell, for one-sided queries
+_ALL_OFFSETS = np.array([(dx, dy, dz)
+                         for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dz in (-1, 0, 1)])
+
+def _hash_grid(pos, radius, group=None):
+    """Cell key of every point (cell size `radius`) plus the sorted keys.
+       Cell coords are padded by one cell so that offsets never wrap around;
+       with `group` the group id is the most significant part of the key."""
+    cell = np.floor((pos - pos.min(axis=0)) / radius).astype(np.int64) + 1
+    dims = cell.max(axis=0) + 2
+    key = (cell[:,0] * dims[1] + cell[:,1]) * dims[2] + cell[:,2]
+    if group is not None:
+        key += np.asarray(group, dtype=np.int64) * int(np.prod(dims))
+    order = np.argsort(key, kind="stable")
+    return key, order, key[order], dims
+
+def _cell_members(qkey, skey, order, off, dims):
+    """For every query key shifted by `off`, the points in that cell ->
+       (query row, point) as flat arrays."""
+    nkey = qkey + (off[0] * dims[1] + off[1]) * dims[2] + off[2]
+    start = np.searchsorted(skey, nkey, side="left")
+    cnt = np.searchsorted(skey, nkey, side="right") - start
+    total = int(cnt.sum())
+    i = np.repeat(np.arange(len(qkey)), cnt)
+    j = order[np.arange(total) - np.repeat(np.cumsum(cnt) - cnt, cnt) + np.repeat(start, cnt)]
+    return i, j
+
+def neighbor_pairs(pos, radius, group=None):
+    """All pairs (i, j), i != j, closer than `radius`, found with a uniform
+       grid of cell size `radius`. Each unordered pair is returned once.
+       With `group` (an int per point) only points of the same group pair up.
+       Returns (i, j, d) as flat arrays."""
+    if len(pos) < 2:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0)
+    key, order, skey, dims = _hash_grid(pos, radius, group)
+    I, J = [], []
+    for off in [(0, 0, 0)] + [tuple(o) for o in _HALF_OFFSETS]:
+        i, j = _cell_members(key, skey, order, off, dims)
+        if off == (0, 0, 0):
+            keep = i < j
+            i, j = i[keep], j[keep]
+        I.append(i); J.append(j)
+    i = np.concatenate(I); j = np.concatenate(J)
+    d = np.linalg.norm(pos[i] - pos[j], axis=1)
+    close = d < radius
+    return i[close], j[close], d[close]
+
+def neighbors_of(pos, radius, rows):
+    """Neighbours of the points `rows` among all points: the grid is built
+       from every position but only the cells around `rows` are searched.
+       Returns (r, j, d) with r indexing `rows`, j != rows[r], d < radius."""
+    rows = np.asarray(rows)
+    if len(pos) < 2 or rows.size == 0:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros(0)
+    key, order, skey, dims = _hash_grid(pos, radius)
+    R, J = [], []
+    for off in _ALL_OFFSETS:
+        r, j = _cell_members(key[rows], skey, order, off, dims)
+        R.append(r); J.append(j)
+    r = np.concatenate(R); j = np.concatenate(J)
+    keep = j != rows[r]
+    r, j = r[keep], j[keep]
+    d = np.linalg.norm(pos[rows[r]] - pos[j], axis=1)
+    close = d < radius
+    return r[close], j[close], d[close]
+
+def _repulsion_brute(pos, radius, only=None):
+    # reference implementation (original per-drone loop); rows of `only` vs all drones
+    rows = range(len(pos)) if only is None else only
+    repulsion = np.zeros((len(rows),3))
+    for r, i in enumerate(rows):
+        dif = pos[i] - pos
+        d = np.linalg.norm(dif, axis=1)
+        d[i] = np.inf
+        close_mask = d < radius
+        if np.any(close_mask):
+            # push away weighted by closeness
+            repulsion[r] = np.sum((dif[close_mask] / (d[close_mask][:,None] + 1e-6)), axis=0)
+    return repulsion
+
+def repulsion_forces(pos, radius=REPULSION_RADIUS, mode=NEIGHBOR_MODE, only=None):
+    """Sum of unit push vectors away from every neighbour closer than
+       `radius` (not yet scaled by rep_k). With `only` (drone indices) just
+       those rows are computed, against all drones."""
+    if mode == "brute":
+        return _repulsion_brute(pos, radius, only)
+    if mode != "grid":
+        raise ValueError(f"Unknown neighbor mode: {mode!r}")
+    if only is None:
+        N = len(pos)
+        i, j, d = neighbor_pairs(pos, radius)
+        push = (pos[i] - pos[j]) / (d[:,None] + 1e-6)
+        repulsion = np.empty((N,3))
+        for a in range(3):
+            repulsion[:,a] = np.bincount(i, push[:,a], N) - np.bincount(j, push[:,a], N)
+        return repulsion
+    M = len(only)
+    r, j, d = neighbors_of(pos, radius, only)
+    push = (pos[np.asarray(only)[r]] - pos[j]) / (d[:,None] + 1e-6)
+    repulsion = np.empty((M,3))
+    for a in range(3):
+        repulsion[:,a] = np.bincount(r, push[:,a], M)
+    return repulsion
 
 # -----------------------------
 # Drone swarm class (3D, PSO-like per-target)
 # -----------------------------
 class DroneSwarm3D:
-    def __init__(self, n=N_DRONES):
+    def __init__(self, n=N_DRONES, assign_method=ASSIGN_METHOD, neighbor_mode=NEIGHBOR_MODE,
+                 freeze_settled=FREEZE_SETTLED):
         self.n = n
+        self.freeze_settled = freeze_settled
+        self.settled = np.zeros(n, dtype=bool)   # frozen on their target
+        self.assign_method = assign_method
+        self.neighbor_mode = neighbor_mode
+        self.last_assignment = None   # stats of the most recent assign()
         # initialize spread positions (avoid clustering)
         margin = 80
         self.pos = np.random.uniform(margin, AREA_SIZE-margin, (n, 3))
@@ -191,8 +619,18 @@ class DroneSwarm3D:
         self.vel = np.random.uniform(-2.0, 2.0, (n, 3))
         self.max_speed = MAX_SPEED
 
-    def assign(self, targets):
-        return greedy_unique_assign(self.pos[:,0:2], targets[:,0:2])
+    def assign(self, targets, method=None):
+        """Assign one target per drone (XY distance) and keep travel stats
+           in self.last_assignment so the assignment modes can be compared."""
+        method = method or self.assign_method
+        t0 = time.perf_counter()
+        assigned = assign_targets(self.pos[:,0:2], targets[:,0:2], method)
+        self.settled[:] = False
+        stats = assignment_stats(self.pos, targets, assigned)
+        stats["method"] = method
+        stats["seconds"] = time.perf_counter() - t0
+        self.last_assignment = stats
+        return assigned
 
     def step(self, targets, assigned, w=0.6, c1=1.2, c2=1.6, rep_k=200.0):
         """
@@ -200,49 +638,58 @@ class DroneSwarm3D:
         - cognitive term attracts to personal best (we use current pos as pb for simplicity)
         - social term attracts to assigned target (per-drone)
         - repulsion term to avoid collisions
+        With freeze_settled, drones that reached their target (SETTLE_POS_TOL,
+        SETTLE_SPEED) are frozen and skipped; they still repel active drones.
         """
         N = self.n
+        if self.freeze_settled:
+            act = np.flatnonzero(~self.settled)
+            if act.size == 0:
+                return
+        else:
+            act = np.arange(N)
+        n_act = len(act)
         # desired positions are the assigned targets (3D)
-        desired = np.copy(self.pos)
-        for i in range(N):
-            a = assigned[i]
-            if a != -1:
-                desired[i] = targets[a]
+        assigned = np.asarray(assigned)[act]
+        pos = self.pos[act]
+        desired = np.copy(pos)
+        has = assigned != -1
+        desired[has] = targets[assigned[has]]
 
         # compute terms
-        r1 = np.random.rand(N,1)
-        r2 = np.random.rand(N,1)
+        r1 = np.random.rand(n_act,1)
+        r2 = np.random.rand(n_act,1)
         # cognitive toward current position (small)
-        cognitive = c1 * r1 * (self.pos - self.pos)  # zero (we keep simple)
-        social = c2 * r2 * (desired - self.pos)
-
-        # repulsion
-        repulsion = np.zeros((N,3))
-        for i in range(N):
-            dif = self.pos[i] - self.pos
-            d = np.linalg.norm(dif, axis=1)
-            d[i] = np.inf
-            close_mask = d < SAFE_DISTANCE*2.0
-            if np.any(close_mask):
-                # push away weighted by closeness
-                push = np.sum((dif[close_mask] / (d[close_mask][:,None] + 1e-6)), axis=0)
-                repulsion[i] = push * rep_k
+        cognitive = c1 * r1 * (pos - pos)  # zero (we keep simple)
+        social = c2 * r2 * (desired - pos)
+
+        # repulsion (neighbours within 2*SAFE_DISTANCE, via the hash grid)
+        repulsion = repulsion_forces(self.pos, REPULSION_RADIUS, self.neighbor_mode,
+                                     only=None if n_act == N else act) * rep_k
 
         # obstacle-free version (no static obstacles here)
-        self.vel = w*self.vel + cognitive + social + repulsion * 0.001
+        vel = w*self.vel[act] + cognitive + social + repulsion * 0.001
 
         # clip speeds
-        speed = np.linalg.norm(self.vel,axis=1)
+        speed = np.linalg.norm(vel,axis=1)
         too = speed > self.max_speed
         if np.any(too):
-            self.vel[too] = (self.vel[too].T * (self.max_speed / speed[too])).T
+            vel[too] = (vel[too].T * (self.max_speed / speed[too])).T
 
         # update positions
-        self.pos += self.vel * DT
+        pos += vel * DT
         # clamp positions into area
-        self.pos[:,0] = np.clip(self.pos[:,0], 0, AREA_SIZE)
-        self.pos[:,1] = np.clip(self.pos[:,1], 0, AREA_SIZE)
-        self.pos[:,2] = np.clip(self.pos[:,2], 20.0, AREA_SIZE*0.6)
+        pos[:,0] = np.clip(pos[:,0], 0, AREA_SIZE)
+        pos[:,1] = np.clip(pos[:,1], 0, AREA_SIZE)
+        pos[:,2] = np.clip(pos[:,2], 20.0, AREA_SIZE*0.6)
+
+        if self.freeze_settled:
+            err = np.linalg.norm(pos - desired, axis=1)
+            done = has & (err < SETTLE_POS_TOL) & (np.linalg.norm(vel, axis=1) < SETTLE_SPEED)
+            vel[done] = 0.0
+            self.settled[act[done]] = True
+        self.vel[act] = vel
+        self.pos[act] = pos
 
 # -----------------------------
 # Base positions for reset (circle near bottom center)
@@ -257,26 +704,202 @@ def compute_base_positions(n):
     pts[:,2] = center[2]
     return pts
 
-BASE_POSITIONS = compute_base_positions(N_DRONES)
 
 # -----------------------------
-# Animation & Phase control
+# Batched swarms (B independent swarms advanced together, for parameter sweeps)
 # -----------------------------
-def run_animation():
-    swarm = DroneSwarm3D(N_DRONES)
-
-    phases = [
-        ("Robot", ROBOT_TARGETS, COLOR_ROBOT),
-        ("Reset", BASE_POSITIONS, "#aaaaaa"),
-        ("Dragon", DRAGON_TARGETS, COLOR_DRAGON),
-        ("Reset", BASE_POSITIONS, "#aaaaaa"),
-        ("Star", STAR_TARGETS, None),   # None => rainbow
-        ("Reset", BASE_POSITIONS, "#aaaaaa"),
+SWEEP_GRID = {
+    "w": [0.4, 0.6, 0.8],
+    "c1": [1.2],
+    "c2": [1.0, 1.6, 2.2],
+    "rep_k": [100.0, 200.0, 400.0],
+}
+
+class BatchedDroneSwarm3D:
+    """B independent copies of DroneSwarm3D in (B, N, 3) arrays with
+       per-swarm w, c1, c2, rep_k. step() is the same PSO-like update as
+       DroneSwarm3D.step, vectorized over the batch. (The cognitive term is
+       zero in this model, so c1 is carried along but has no effect.)
+       Every swarm draws from its own generator: `seed` is one seed per
+       swarm, or a single seed (or None) that is split into B independent
+       streams. A swarm's run depends only on its seed and parameters, not
+       on the batch size or its position in the batch."""
+    def __init__(self, B, n=N_DRONES, w=0.6, c1=1.2, c2=1.6, rep_k=200.0, seed=None):
+        self.B = B
+        self.n = n
+        if np.ndim(seed) == 0:
+            self.rngs = [np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(B)]
+        else:
+            if len(seed) != B:
+                raise ValueError(f"expected {B} seeds, got {len(seed)}")
+            self.rngs = [np.random.default_rng(s) for s in seed]
+        per_swarm = lambda v: np.broadcast_to(np.asarray(v, dtype=float), (B,)).reshape(B, 1, 1).copy()
+        self.w, self.c1, self.c2, self.rep_k = (per_swarm(v) for v in (w, c1, c2, rep_k))
+        margin = 80
+        self.pos = np.empty((B, n, 3))
+        self.vel = np.empty((B, n, 3))
+        for b, rng in enumerate(self.rngs):
+            self.pos[b] = rng.uniform(margin, AREA_SIZE-margin, (n, 3))
+            self.pos[b,:,2] = rng.uniform(180, 320, n)
+            self.vel[b] = rng.uniform(-2.0, 2.0, (n, 3))
+        self.max_speed = MAX_SPEED
+        self._group = np.repeat(np.arange(B), n)   # swarm id of every flat drone
+
+    def assign(self, targets, method=ASSIGN_METHOD):
+        return np.stack([assign_targets(self.pos[b,:,0:2], targets[:,0:2], method)
+                         for b in range(self.B)])
+
+    def close_pairs(self):
+        """Neighbour pairs of every swarm -> (swarm id, i, j, d), flat indices.
+           One hash grid serves the batch (the swarm id is part of the cell
+           key). Pairs come in a canonical order (i < j, sorted by j then i) so
+           the repulsion sums of a swarm do not depend on where the shared grid
+           puts its cell boundaries, i.e. on the rest of the batch."""
+        i, j, d = neighbor_pairs(self.pos.reshape(-1, 3), REPULSION_RADIUS, self._group)
+        i, j = np.minimum(i, j), np.maximum(i, j)
+        order = np.lexsort((i, j))
+        i, j, d = i[order], j[order], d[order]
+        return i // self.n, i, j, d
+
+    def step(self, targets, assigned):
+        """One step for all swarms; returns collisions (pairs closer than
+           SAFE_DISTANCE) per swarm in this step."""
+        B, N = self.B, self.n
+        has = assigned != -1
+        desired = np.where(has[...,None], targets[np.maximum(assigned, 0)], self.pos)
+        r2 = np.stack([rng.random((N, 1)) for rng in self.rngs])
+        social = self.c2 * r2 * (desired - self.pos)
+
+        sw, i, j, d = self.close_pairs()
+        push = (self.pos.reshape(-1, 3)[i] - self.pos.reshape(-1, 3)[j]) / (d[:,None] + 1e-6)
+        repulsion = np.empty((B * N, 3))
+        for a in range(3):
+            repulsion[:,a] = np.bincount(i, push[:,a], B * N) - np.bincount(j, push[:,a], B * N)
+        repulsion = repulsion.reshape(B, N, 3) * self.rep_k
+
+        self.vel = self.w * self.vel + social + repulsion * 0.001
+        speed = np.linalg.norm(self.vel, axis=2, keepdims=True)
+        self.vel *= np.minimum(1.0, self.max_speed / np.maximum(speed, 1e-12))
+        self.pos += self.vel * DT
+        self.pos[...,0] = np.clip(self.pos[...,0], 0, AREA_SIZE)
+        self.pos[...,1] = np.clip(self.pos[...,1], 0, AREA_SIZE)
+        self.pos[...,2] = np.clip(self.pos[...,2], 20.0, AREA_SIZE*0.6)
+        return np.bincount(sw[d < SAFE_DISTANCE], minlength=B)
+
+    def run(self, targets, n_frames=FRAMES_PER_PHASE, tol=CONVERGE_TOL):
+        """Fly every swarm to `targets` for n_frames. Returns per-swarm
+           convergence frame (-1 if never), total collisions and final max error
+           (over drones with a target; with n_frames=0, the starting error)."""
+        assigned = self.assign(targets)
+        has = assigned != -1
+        goal = targets[np.maximum(assigned, 0)]
+        max_error = lambda: np.where(has, np.linalg.norm(self.pos - goal, axis=2), 0.0).max(axis=1)
+        converged = np.full(self.B, -1)
+        collisions = np.zeros(self.B, dtype=int)
+        err = max_error()
+        for f in range(n_frames):
+            collisions += self.step(targets, assigned)
+            err = max_error()
+            converged[(converged == -1) & (err < tol)] = f
+        return {"converged_frame": converged, "collisions": collisions, "final_max_error": err}
+
+def sweep_parameters(grid=None, targets=None, n_frames=FRAMES_PER_PHASE, seeds=(SEED,),
+                     batch_size=64):
+    """Evaluate every combination of `grid` (dict of lists for w, c1, c2,
+       rep_k) x seeds, batch_size swarms at a time. Returns one row per run."""
+    import itertools
+    grid = {**SWEEP_GRID, **(grid or {})}
+    targets = formation_targets("robot") if targets is None else targets
+    names = ["w", "c1", "c2", "rep_k"]
+    combos = [dict(zip(names, vals), seed=seed)
+              for vals in itertools.product(*(grid[k] for k in names)) for seed in seeds]
+    rows = []
+    for s in range(0, len(combos), batch_size):
+        chunk = combos[s:s+batch_size]
+        swarm = BatchedDroneSwarm3D(len(chunk), len(targets),
+                                    **{k: [c[k] for c in chunk] for k in names},
+                                    seed=[c["seed"] for c in chunk])
+        res = swarm.run(targets, n_frames)
+        for b, c in enumerate(chunk):
+            rows.append({**c, **{k: v[b].item() for k, v in res.items()}})
+    return rows
+
+# -----------------------------
+# Show timeline (shared by the live view and the headless export)
+# -----------------------------
+def build_phases(n=N_DRONES):
+    base = compute_base_positions(n)
+    return [
+        ("Robot", formation_targets("robot", n), COLOR_ROBOT),
+        ("Reset", base, "#aaaaaa"),
+        ("Dragon", formation_targets("dragon", n), COLOR_DRAGON),
+        ("Reset", base, "#aaaaaa"),
+        ("Star", formation_targets("star", n), None),   # None => rainbow
+        ("Reset", base, "#aaaaaa"),
     ]
-    # frames per phase: for target phases we use FRAMES_PER_PHASE + HOLD_FRAMES; reset phases use RESET_FRAMES
-    # We'll iterate phases cyclically
-    # Prepare plot
-    fig = plt.figure(figsize=(10,8))
+
+# frames per phase: for target phases we use FRAMES_PER_PHASE + HOLD_FRAMES; reset phases use RESET_FRAMES
+def phase_frame_count(name):
+    if name == "Reset":
+        return RESET_FRAMES
+    else:
+        return FRAMES_PER_PHASE + HOLD_FRAMES
+
+def cycle_frame_count(phases):
+    return sum(phase_frame_count(name) for name, _, _ in phases)
+
+# helper to get drone colors
+def colors_for_phase(color_flag, n=N_DRONES):
+    if color_flag is None:
+        # rainbow
+        cmap = CMAP_RAINBOW if n == CMAP_RAINBOW.N else plt.get_cmap("hsv", n)
+        return cmap(np.arange(n))[:,:3]
+    else:
+        return np.array([color_flag]*n)
+
+def iter_show(swarm, phases, n_frames=None, early_end=None):
+    """Advance the swarm through the phases cyclically, one step per frame.
+       Yields (phase_idx, frame_in_phase, assigned) after each step; the
+       assignment is recomputed on the first frame of every phase.
+       With early_end, a phase stops HOLD_FRAMES after every drone settled
+       (reset phases stop as soon as they settle). Defaults to EARLY_PHASE_END."""
+    early_end = EARLY_PHASE_END if early_end is None else early_end
+    frame = 0
+    phase_idx = 0
+    while True:
+        phase_name, targets, _ = phases[phase_idx]
+        assigned = swarm.assign(targets)
+        settled_at = None
+        for frame_in_phase in range(phase_frame_count(phase_name)):
+            if n_frames is not None and frame >= n_frames:
+                return
+            swarm.step(targets, assigned)
+            yield phase_idx, frame_in_phase, assigned
+            frame += 1
+            if early_end:
+                if settled_at is None and swarm.settled.all():
+                    settled_at = frame_in_phase
+                hold = 0 if phase_name == "Reset" else HOLD_FRAMES
+                if settled_at is not None and frame_in_phase - settled_at >= hold:
+                    break
+        phase_idx = (phase_idx + 1) % len(phases)
+
+def simulate_show(n_frames, swarm=None, phases=None):
+    """Run the whole timeline up front. Returns positions (F, N, 3) float32
+       plus the phase index and frame-in-phase of every frame."""
+    swarm = swarm or DroneSwarm3D(N_DRONES)
+    phases = phases or build_phases()
+    positions = np.empty((n_frames, swarm.n, 3), dtype=np.float32)
+    phase_of_frame = np.empty(n_frames, dtype=np.int16)
+    frame_in_phase = np.empty(n_frames, dtype=np.int32)
+    for f, (p, fip, _) in enumerate(iter_show(swarm, phases, n_frames)):
+        positions[f] = swarm.pos
+        phase_of_frame[f] = p
+        frame_in_phase[f] = fip
+    return positions, phase_of_frame, frame_in_phase
+
+def make_show_axes(fig):
+    """Black 3D axes with the drone and target scatters used by every renderer."""
     ax = fig.add_subplot(111, projection='3d')
     ax.set_facecolor('k')
     ax.xaxis.set_pane_color((0,0,0,1))
@@ -285,95 +908,586 @@ def run_animation():
     ax.set_xlim(0, AREA_SIZE); ax.set_ylim(0, AREA_SIZE); ax.set_zlim(0, AREA_SIZE*0.6)
     ax.set_xticks([]); ax.set_yticks([]); ax.set_zticks([])
     title = ax.set_title("", color='w')
-
-    # initial scatter
-    xs = swarm.pos[:,0]; ys = swarm.pos[:,1]; zs = swarm.pos[:,2]
-    scat = ax.scatter(xs, ys, zs, s=48, edgecolors='k', linewidth=0.3)
+    scat = ax.scatter([], [], [], s=48, edgecolors='k', linewidth=0.3)
     targ_scat = ax.scatter([],[],[], s=70, c='yellow', marker='x', alpha=0.7)
+    return ax, scat, targ_scat, title
 
-    # phase state
-    phase_idx = 0
-    frame_in_phase = 0
-    # compute frame counts for phases
-    def phase_frame_count(name):
-        if name == "Reset":
-            return RESET_FRAMES
-        else:
-            return FRAMES_PER_PHASE + HOLD_FRAMES
-
-    # initialize assigned targets
-    current_targets = phases[phase_idx][1]
-    current_color = phases[phase_idx][2]
-    assigned = swarm.assign(current_targets)
-
-    # helper to get drone colors
-    def colors_for_phase(color_flag):
-        if color_flag is None:
-            # rainbow
-            cols = CMAP_RAINBOW(np.arange(N_DRONES))[:,:3]
-            return cols
+class Mplot3DRenderer:
+    """Original look: mplot3d scatter (fine for tens of drones)."""
+    blit = False
+
+    def __init__(self, fig):
+        self.ax, self.scat, self.targ_scat, self.title = make_show_axes(fig)
+
+    def set_phase(self, colors, targets):
+        self.scat.set_color(colors)
+        self.targ_scat._offsets3d = (targets[:,0], targets[:,1], targets[:,2])
+
+    def draw(self, pos, title):
+        self.scat._offsets3d = (pos[:,0], pos[:,1], pos[:,2])
+        self.title.set_text(title)
+        return self.scat, self.targ_scat, self.title
+
+class FastSwarmRenderer:
+    """Renderer for thousands of drones. Projection, depth sort (far to near)
+       and depth-scaled point size are done in NumPy, and the drones are
+       splatted as discs straight into an RGB frame shown by one imshow on an
+       axes that fills the figure, so matplotlib only blits an image and two
+       texts per frame (blitting needs the artists to live on an axes)."""
+    blit = True
+    MAX_RADIUS = 6
+
+    def __init__(self, fig, azim=-60.0, elev=22.0, fov=45.0, point_size=None):
+        fig.set_facecolor('k')
+        w, h = fig.get_size_inches() * fig.dpi
+        self.width, self.height = int(w), int(h)
+        self.frame = np.zeros((self.height, self.width, 4), dtype=np.uint8)
+        self.frame[..., 3] = 255          # RGBA, so matplotlib does not convert it every frame
+        # axes spanning the whole figure with one data unit per pixel (no resampling)
+        ax = fig.add_axes([0, 0, 1, 1])
+        ax.set_axis_off()
+        self.image = ax.imshow(self.frame, origin='upper', interpolation='nearest', aspect='auto',
+                               extent=(0, self.width, self.height, 0))
+        self.title = ax.text(0.5, 0.98, "", color='w', ha='center', va='top',
+                             transform=ax.transAxes)
+        self.overlay = ax.text(0.01, 0.01, "", color='#8f8', family='monospace', fontsize=9,
+                               transform=ax.transAxes)
+        self.ax = ax
+        self.point_size = point_size      # disc radius in px at the reference depth; None: from N
+        # camera looking at the middle of the show volume
+        center = np.array([AREA_SIZE*0.5, AREA_SIZE*0.5, AREA_SIZE*0.3])
+        a, e = np.radians(azim), np.radians(elev)
+        back = np.array([np.cos(e)*np.cos(a), np.cos(e)*np.sin(a), np.sin(e)])
+        self.dist = AREA_SIZE * 1.6
+        self.eye = center + back * self.dist
+        fwd = -back
+        right = np.cross(fwd, [0.0, 0.0, 1.0]); right /= np.linalg.norm(right)
+        up = np.cross(right, fwd)
+        self.basis = np.stack([right, up, fwd])      # rows: camera x, y, depth
+        self.focal = 0.5 * self.width / np.tan(np.radians(fov) / 2)   # in pixels
+        # disc stencils: offsets[r] = (dy, dx) of every pixel within radius r
+        self.stencils = []
+        for r in range(self.MAX_RADIUS + 1):
+            dy, dx = np.mgrid[-r:r+1, -r:r+1]
+            inside = dx*dx + dy*dy <= r*r + r
+            self.stencils.append((dy[inside], dx[inside]))
+        self.colors = np.zeros((0, 3), dtype=np.uint8)
+        self.target_px = (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp))
+        self._last = None
+        self._frame_ms = None
+
+    def project(self, pts):
+        """World (N,3) -> pixel column, pixel row and depth (camera space)."""
+        cam = (np.asarray(pts, dtype=float) - self.eye) @ self.basis.T
+        depth = np.maximum(cam[:,2], 1e-6)
+        col = self.width * 0.5 + self.focal * cam[:,0] / depth
+        row = self.height * 0.5 - self.focal * cam[:,1] / depth
+        return col, row, depth
+
+    def set_phase(self, colors, targets):
+        from matplotlib.colors import to_rgba_array
+        self.colors = (to_rgba_array(colors)[:, :3] * 255).astype(np.uint8)
+        if self.point_size is None:
+            self.point_size = float(np.clip(4.0 * np.sqrt(200.0 / len(targets)), 1.0, 4.0))
+        col, row, _ = self.project(targets)
+        ok = (col >= 0) & (col < self.width) & (row >= 0) & (row < self.height)
+        self.target_px = (row[ok].astype(np.intp), col[ok].astype(np.intp))
+
+    def splat(self, pos):
+        """Rasterize drones into self.frame, far to near (painter's algorithm)."""
+        col, row, depth = self.project(pos)
+        order = np.argsort(-depth)
+        radius = np.clip(np.rint(self.point_size * self.dist / depth[order]), 0, self.MAX_RADIUS).astype(np.intp)
+        col, row = np.rint(col[order]).astype(np.intp), np.rint(row[order]).astype(np.intp)
+        colors = self.colors[order] if len(self.colors) == len(pos) else np.full((len(pos), 3), 255, np.uint8)
+        # one (point, stencil pixel) list per radius; re-sorted by point rank so nearer drones win
+        rank, ys, xs = [], [], []
+        for r in np.unique(radius):
+            idx = np.flatnonzero(radius == r)
+            dy, dx = self.stencils[r]
+            rank.append(np.repeat(idx, len(dy)))
+            ys.append((row[idx, None] + dy).ravel())
+            xs.append((col[idx, None] + dx).ravel())
+        rank, ys, xs = np.concatenate(rank), np.concatenate(ys), np.concatenate(xs)
+        keep = (ys >= 0) & (ys < self.height) & (xs >= 0) & (xs < self.width)
+        rank, ys, xs = rank[keep], ys[keep], xs[keep]
+        by_rank = np.argsort(rank, kind='stable')
+        rgb = self.frame[..., :3]
+        rgb.fill(0)
+        rgb[self.target_px] = (110, 110, 0)
+        rgb[ys[by_rank], xs[by_rank]] = colors[rank[by_rank]]
+        return self.frame
+
+    def draw(self, pos, title):
+        self.image.set_data(self.splat(pos))
+        self.title.set_text(title)
+        now = time.perf_counter()
+        if self._last is not None:
+            ms = (now - self._last) * 1000
+            self._frame_ms = ms if self._frame_ms is None else 0.9 * self._frame_ms + 0.1 * ms
+            self.overlay.set_text(f"{self._frame_ms:6.1f} ms/frame  {1000 / self._frame_ms:5.1f} FPS  N={len(pos)}")
+        self._last = now
+        return self.image, self.title, self.overlay
+
+RENDERERS = {"mplot3d": Mplot3DRenderer, "fast": FastSwarmRenderer}
+FAST_RENDER_MIN = 500     # "auto" switches to the fast renderer from this many drones
+
+def make_renderer(fig, name, n_drones):
+    if name == "auto":
+        name = "fast" if n_drones >= FAST_RENDER_MIN else "mplot3d"
+    return RENDERERS[name](fig)
+
+def phase_title(phases, phase_idx, frame_in_phase):
+    phase_name = phases[phase_idx][0]
+    total_frames = phase_frame_count(phase_name)
+    return f"Phase: {phase_name} ({phase_idx+1}/{len(phases)}) Frame {frame_in_phase+1}/{total_frames}"
+
+# -----------------------------
+# Trajectory recording / replay (np.memmap, structure of arrays)
+# -----------------------------
+# Layout: 64-byte header, then one contiguous block per field, frame-major:
+#   phase (F,) int32 | frame_in_phase (F,) int32 | pos (F,N,3) float32 |
+#   vel (F,N,3) float32 | assigned (F,N) int32
+TRAJ_MAGIC = b"DRNTRAJ1"
+TRAJ_VERSION = 1
+TRAJ_HEADER = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("n_frames", "<u4"),
+    ("n_drones", "<u4"),
+    ("interval_ms", "<u4"),
+    ("reserved", "u1", (40,)),
+])
+
+def _traj_layout(n_frames, n_drones):
+    fields = [
+        ("phase", np.int32, (n_frames,)),
+        ("frame_in_phase", np.int32, (n_frames,)),
+        ("pos", np.float32, (n_frames, n_drones, 3)),
+        ("vel", np.float32, (n_frames, n_drones, 3)),
+        ("assigned", np.int32, (n_frames, n_drones)),
+    ]
+    offset = TRAJ_HEADER.itemsize
+    layout = []
+    for name, dtype, shape in fields:
+        layout.append((name, dtype, shape, offset))
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return layout, offset
+
+class TrajectoryRecorder:
+    """Writes a show frame by frame into a preallocated memory-mapped file
+       (or into plain in-memory arrays when path is None)."""
+    def __init__(self, path, n_frames, n_drones):
+        self.path = path
+        self.n_frames = n_frames
+        layout, size = _traj_layout(n_frames, n_drones)
+        if path is None:
+            for name, dtype, shape, _ in layout:
+                setattr(self, name, np.zeros(shape, dtype=dtype))
+            return
+        with open(path, "wb") as f:
+            header = np.zeros((), dtype=TRAJ_HEADER)
+            header["magic"] = TRAJ_MAGIC
+            header["version"] = TRAJ_VERSION
+            header["n_frames"] = n_frames
+            header["n_drones"] = n_drones
+            header["interval_ms"] = INTERVAL_MS
+            f.write(header.tobytes())
+            f.truncate(size)
+        for name, dtype, shape, offset in layout:
+            setattr(self, name, np.memmap(path, dtype=dtype, mode="r+", offset=offset, shape=shape))
+
+    def __len__(self):
+        return self.n_frames
+
+    def record(self, frame, swarm, assigned, phase_idx, frame_in_phase):
+        self.pos[frame] = swarm.pos
+        self.vel[frame] = swarm.vel
+        self.assigned[frame] = assigned
+        self.phase[frame] = phase_idx
+        self.frame_in_phase[frame] = frame_in_phase
+
+    def close(self):
+        if self.path is None:
+            return
+        for name in ("phase", "frame_in_phase", "pos", "vel", "assigned"):
+            getattr(self, name).flush()
+
+class TrajectoryFile:
+    """Read-only view of a recorded show; every field is a zero-copy memmap,
+       so any frame can be read directly without loading the file."""
+    def __init__(self, path):
+        header = np.fromfile(path, dtype=TRAJ_HEADER, count=1)
+        if len(header) == 0 or header["magic"][0] != TRAJ_MAGIC:
+            raise ValueError(f"{path} is not a drone trajectory file")
+        if header["version"][0] != TRAJ_VERSION:
+            raise ValueError(f"Unsupported trajectory version {header['version'][0]}")
+        self.path = path
+        self.n_frames = int(header["n_frames"][0])
+        self.n_drones = int(header["n_drones"][0])
+        self.interval_ms = int(header["interval_ms"][0])
+        layout, _ = _traj_layout(self.n_frames, self.n_drones)
+        for name, dtype, shape, offset in layout:
+            setattr(self, name, np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=shape))
+
+    def __len__(self):
+        return self.n_frames
+
+def record_show(path, n_frames, swarm=None, phases=None):
+    """Simulate n_frames and stream them to `path`; memory stays at one frame."""
+    swarm = swarm or DroneSwarm3D(N_DRONES)
+    phases = phases or build_phases()
+    rec = TrajectoryRecorder(path, n_frames, swarm.n)
+    for f, (p, fip, assigned) in enumerate(iter_show(swarm, phases, n_frames)):
+        rec.record(f, swarm, assigned, p, fip)
+    rec.close()
+    return path
+
+def seconds_to_frames(seconds, phases):
+    if seconds is None:
+        return cycle_frame_count(phases)
+    return max(1, int(seconds * 1000 / INTERVAL_MS))
+
+# -----------------------------
+# Show compiler: phases -> validated per-frame lookup tables
+# -----------------------------
+class CompiledShow:
+    """Precomputed timeline. Every per-frame quantity is a table indexed by
+       frame number (positions, phase, max error, min separation, violations);
+       colors are one table per phase. Playback is a lookup, never a step()."""
+    def __init__(self, table, phases, colors, max_error, min_separation, violations, report):
+        self.table = table
+        self.phases = phases
+        self.pos = table.pos
+        self.phase = table.phase
+        self.frame_in_phase = table.frame_in_phase
+        self.assigned = table.assigned
+        self.n_drones = self.pos.shape[1]
+        self.colors = colors                  # (n_phases, N, 3) float32
+        self.max_error = max_error            # (F,) distance of the worst drone to its target
+        self.min_separation = min_separation  # (F,) inf if no pair closer than 2*SAFE_DISTANCE
+        self.violations = violations          # (F,) pairs closer than SAFE_DISTANCE
+        self.report = report                  # one dict per phase occurrence
+
+    def __len__(self):
+        return len(self.pos)
+
+    def frame_colors(self, frame):
+        return self.colors[self.phase[frame]]
+
+    def problems(self):
+        """Human readable list of phases that did not converge or had collisions."""
+        out = []
+        for r in self.report:
+            if r["converged_frame"] is None:
+                out.append(f"{r['name']} @ frame {r['start']}: no converge "
+                           f"(error final {r['final_max_error']:.1f} > {CONVERGE_TOL:.1f})")
+            if r["violation_frames"]:
+                out.append(f"{r['name']} @ frame {r['start']}: {r['violation_frames']} frames "
+                           f"con drones a menos de {SAFE_DISTANCE} (mínimo {r['min_separation']:.2f})")
+        return out
+
+def compile_show(phases=None, n_frames=None, swarm=None, path=None, tol=CONVERGE_TOL):
+    """Simulate the timeline once and build a CompiledShow with positions,
+       per-phase colors, per-frame separation/error and a convergence report.
+       With `path`, positions are written to a trajectory file (memmap)."""
+    from matplotlib.colors import to_rgba_array
+    swarm = swarm or DroneSwarm3D(N_DRONES)
+    phases = phases or build_phases()
+    n_frames = n_frames or cycle_frame_count(phases)
+    table = TrajectoryRecorder(path, n_frames, swarm.n)
+    max_error = np.empty(n_frames, dtype=np.float32)
+    min_sep = np.empty(n_frames, dtype=np.float32)
+    violations = np.empty(n_frames, dtype=np.int32)
+    flown = np.empty(n_frames, dtype=np.float32)     # summed drone displacement per frame
+    prev = swarm.pos.copy()
+    for f, (p, fip, assigned) in enumerate(iter_show(swarm, phases, n_frames)):
+        table.record(f, swarm, assigned, p, fip)
+        flown[f] = np.linalg.norm(swarm.pos - prev, axis=1).sum()
+        prev[:] = swarm.pos
+        targets = phases[p][1]
+        max_error[f] = np.max(np.linalg.norm(swarm.pos - targets[assigned], axis=1))
+        _, _, d = neighbor_pairs(swarm.pos, REPULSION_RADIUS)
+        min_sep[f] = d.min() if d.size else np.inf
+        violations[f] = np.count_nonzero(d < SAFE_DISTANCE)
+    table.close()
+
+    colors = np.stack([to_rgba_array(colors_for_phase(flag, swarm.n))[:, :3]
+                       for _, _, flag in phases]).astype(np.float32)
+
+    # one report entry per contiguous run of a phase
+    report = []
+    starts = np.flatnonzero(table.frame_in_phase[:n_frames] == 0)
+    if starts.size == 0 or starts[0] != 0:
+        starts = np.r_[0, starts]
+    ends = np.r_[starts[1:], n_frames]
+    for a, b in zip(starts, ends):
+        err = max_error[a:b]
+        below = np.flatnonzero(err < tol)
+        report.append({
+            "name": phases[int(table.phase[a])][0],
+            "start": int(a),
+            "frames": int(b - a),
+            "converged_frame": int(below[0]) if below.size else None,
+            "final_max_error": float(err[-1]),
+            "min_separation": float(min_sep[a:b].min()),
+            "violation_frames": int(np.count_nonzero(violations[a:b])),
+            "flight_distance": float(flown[a:b].sum()),
+        })
+    if path is not None:
+        table = TrajectoryFile(path)
+    return CompiledShow(table, phases, colors, max_error, min_sep, violations, report)
+
+def open_show_table(replay):
+    """A CompiledShow / TrajectoryFile is used as is, a path is memory-mapped."""
+    return replay if hasattr(replay, "pos") else TrajectoryFile(replay)
+
+def replay_phases(traj):
+    """Phases of a recorded show: the compiled ones, or rebuilt for the drone
+       count stored in the file (not N_DRONES)."""
+    phases = getattr(traj, "phases", None)
+    return phases if phases is not None else build_phases(traj.n_drones)
+
+# -----------------------------
+# Headless export (parallel rasterization + streaming encoder)
+# -----------------------------
+EXPORT_WIDTH = 800
+EXPORT_HEIGHT = 640
+EXPORT_DPI = 100
+
+_RENDER = {}   # per-process renderer state (figure, artists, phase table)
+
+def _render_init(width, height, phases, renderer="auto"):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    fig = Figure(figsize=(width / EXPORT_DPI, height / EXPORT_DPI), dpi=EXPORT_DPI)
+    canvas = FigureCanvasAgg(fig)
+    n_drones = len(phases[0][1])
+    _RENDER.update(canvas=canvas, view=make_renderer(fig, renderer, n_drones),
+                   phases=phases, phase_idx=None)
+
+def _render_frame(task):
+    """Rasterize one frame -> (H, W, 3) uint8 RGB."""
+    phase_idx, frame_in_phase, pos = task
+    r = _RENDER
+    phases = r["phases"]
+    if phase_idx != r["phase_idx"]:
+        r["view"].set_phase(colors_for_phase(phases[phase_idx][2], len(pos)), phases[phase_idx][1])
+        r["phase_idx"] = phase_idx
+    r["view"].draw(pos, phase_title(phases, phase_idx, frame_in_phase))
+    r["canvas"].draw()
+    return np.asarray(r["canvas"].buffer_rgba())[:, :, :3].copy()
+
+class FFmpegWriter:
+    """Pipe raw RGB frames into a local ffmpeg process (GIF, MP4, ...)."""
+    def __init__(self, path, width, height, fps, ffmpeg):
+        import subprocess
+        cmd = [ffmpeg, "-y", "-loglevel", "error",
+               "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}",
+               "-r", str(fps), "-i", "-"]
+        if not path.lower().endswith(".gif"):
+            cmd += ["-pix_fmt", "yuv420p"]
+        self.proc = subprocess.Popen(cmd + [path], stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        self.proc.stdin.write(frame.tobytes())
+
+    def close(self):
+        self.proc.stdin.close()
+        if self.proc.wait() != 0:
+            raise RuntimeError("ffmpeg failed")
+
+class PillowGifWriter:
+    """Streaming GIF encoder: every frame is quantized and appended to the
+       file with its own palette, so frames are never accumulated."""
+    def __init__(self, path, fps):
+        self.fp = open(path, "wb")
+        self.duration = 1000.0 / fps
+        self.started = False
+
+    def write(self, frame):
+        from PIL import Image, GifImagePlugin
+        im = Image.fromarray(frame).quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+        if not self.started:
+            header, _ = GifImagePlugin.getheader(im, info={"loop": 0})
+            self.fp.write(b"".join(header))
+            self.started = True
+        for chunk in GifImagePlugin.getdata(im, duration=self.duration, include_color_table=True):
+            self.fp.write(chunk)
+
+    def close(self):
+        self.fp.write(b";")
+        self.fp.close()
+
+def open_video_writer(path, width, height, fps):
+    import shutil
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        return FFmpegWriter(path, width, height, fps, ffmpeg)
+    if path.lower().endswith(".gif"):
+        return PillowGifWriter(path, fps)
+    raise RuntimeError(f"ffmpeg not found: cannot encode {path} (use a .gif output)")
+
+def export_show(output=GIF_FILENAME, seconds=None, width=EXPORT_WIDTH, height=EXPORT_HEIGHT,
+                workers=None, fps=GIF_FPS, replay=None, renderer="auto"):
+    """Headless export: simulate the full timeline (or read it from a
+       recorded trajectory file), rasterize the frames in a process pool and
+       stream them, in order, into the encoder. At most a small window of
+       frames is alive at any time."""
+    import multiprocessing as mp
+    traj = open_show_table(replay) if replay is not None else None
+    phases = replay_phases(traj) if traj is not None else build_phases()
+    width -= width % 2; height -= height % 2     # yuv420p needs even sizes
+    workers = max(1, workers or os.cpu_count() or 1)
+
+    t0 = time.perf_counter()
+    if traj is not None:
+        n_frames = min(len(traj), seconds_to_frames(seconds, phases)) if seconds else len(traj)
+        positions, phase_of_frame, frame_in_phase = traj.pos, traj.phase, traj.frame_in_phase
+    else:
+        n_frames = seconds_to_frames(seconds, phases)
+        positions, phase_of_frame, frame_in_phase = simulate_show(n_frames, phases=phases)
+    t_sim = time.perf_counter() - t0
+    print(f"Simulados {n_frames} frames en {t_sim:.1f}s")
+
+    tasks = ((int(phase_of_frame[f]), int(frame_in_phase[f]), positions[f]) for f in range(n_frames))
+    writer = open_video_writer(output, width, height, fps)
+    window = workers * 8
+    try:
+        if workers == 1:
+            _render_init(width, height, phases, renderer)
+            for task in tasks:
+                writer.write(_render_frame(task))
         else:
-            return np.array([color_flag]*N_DRONES)
+            with mp.Pool(workers, initializer=_render_init,
+                         initargs=(width, height, phases, renderer)) as pool:
+                for s in range(0, n_frames, window):
+                    batch = [next(tasks) for _ in range(min(window, n_frames - s))]
+                    for frame in pool.imap(_render_frame, batch):
+                        writer.write(frame)
+    finally:
+        writer.close()
+    t_total = time.perf_counter() - t0
+    print(f"Video guardado: {output} ({n_frames} frames, {width}x{height}, "
+          f"{workers} workers, {n_frames / max(t_total - t_sim, 1e-9):.1f} fps de render)")
+    return output
+
+# -----------------------------
+# Animation & Phase control
+# -----------------------------
+def run_animation(replay=None, renderer="auto"):
+    """Live view. With `replay` (a file from record_show or a CompiledShow)
+       frames are looked up in the table instead of being simulated.
+       renderer: "mplot3d", "fast" (blitted 2D projection) or "auto"."""
+    table_colors = None
+    if replay is not None:
+        traj = open_show_table(replay)
+        n_drones = traj.n_drones
+        phases = replay_phases(traj)
+        table_colors = getattr(traj, "colors", None)   # CompiledShow: per-phase color tables
+        def next_frame(frame):
+            f = frame % len(traj)
+            return int(traj.phase[f]), int(traj.frame_in_phase[f]), traj.pos[f]
+    else:
+        phases = build_phases()
+        swarm = DroneSwarm3D(N_DRONES)
+        n_drones = swarm.n
+        # We'll iterate phases cyclically
+        show = iter_show(swarm, phases)
+        def next_frame(frame):
+            phase_idx, frame_in_phase, _ = next(show)
+            return phase_idx, frame_in_phase, swarm.pos
 
-    drone_colors = colors_for_phase(current_color)
-    scat.set_color(drone_colors)
+    # Prepare plot
+    fig = plt.figure(figsize=(10,8))
+    view = make_renderer(fig, renderer, n_drones)
+    shown_phase = None
 
     # update function
     def update(frame):
-        nonlocal phase_idx, frame_in_phase, current_targets, current_color, assigned, drone_colors
+        nonlocal shown_phase
+        phase_idx, frame_in_phase, pos = next_frame(frame)
         phase_name, targets, color_flag = phases[phase_idx]
-        total_frames = phase_frame_count(phase_name)
-
-        # On first frame of phase, recompute assignments
-        if frame_in_phase == 0:
-            assigned = swarm.assign(targets)
-            drone_colors = colors_for_phase(color_flag)
-            scat.set_color(drone_colors)
-            targ_scat._offsets3d = (targets[:,0], targets[:,1], targets[:,2])
-
-        # swarm moves toward targets (only during target and reset frames)
-        if phase_name == "Reset":
-            # reset: we want them to move to base quickly; use fewer PSO frames but stronger alpha (handled by step)
-            swarm.step(targets, assigned)
-        else:
-            # normal target convergence
-            swarm.step(targets, assigned)
-
-        # update scatter points
-        pos = swarm.pos
-        scat._offsets3d = (pos[:,0], pos[:,1], pos[:,2])
-        title.set_text(f"Phase: {phase_name} ({phase_idx+1}/{len(phases)}) Frame {frame_in_phase+1}/{total_frames}")
 
-        frame_in_phase += 1
-        if frame_in_phase >= total_frames:
-            # advance to next phase
-            phase_idx = (phase_idx + 1) % len(phases)
-            frame_in_phase = 0
+        # On phase change, refresh colors and target markers
+        if phase_idx != shown_phase:
+            if table_colors is not None:
+                view.set_phase(table_colors[phase_idx], targets)
+            else:
+                view.set_phase(colors_for_phase(color_flag, n_drones), targets)
+            shown_phase = phase_idx
 
-        return scat, targ_scat, title
+        # update scatter points
+        return view.draw(pos, phase_title(phases, phase_idx, frame_in_phase))
 
-    ani = animation.FuncAnimation(fig, update, interval=INTERVAL_MS, blit=False)
+    # GIF / video output goes through export_show (--headless); this is only the live window
+    ani = animation.FuncAnimation(fig, update, interval=INTERVAL_MS, blit=view.blit,
+                                  cache_frame_data=False)
     # keep a persistent reference to the animation to avoid it being garbage-collected
     try:
         fig.anim = ani
     except Exception:
         globals()['anim'] = ani
 
-    # Optionally save to GIF (requires Pillow/Imagemagick/ffmpeg or Pillow writer)
-    if SAVE_GIF:
-        try:
-            from PIL import Image
-            print(f"Guardando animación como GIF: {GIF_FILENAME} (fps={GIF_FPS})")
-            # use PillowWriter via matplotlib's animation API
-            writer = animation.PillowWriter(fps=GIF_FPS)
-            ani.save(GIF_FILENAME, writer=writer)
-            print(f"GIF guardado: {GIF_FILENAME}")
-        except Exception as e:
-            print("No fue posible guardar GIF automáticamente:", type(e).__name__, e)
-
     plt.show()
     return ani
 
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Drone Light Show")
+    parser.add_argument("--headless", action="store_true",
+                        help="exportar el show a video sin ventana (render en paralelo)")
+    parser.add_argument("--output", default=GIF_FILENAME, help="archivo de salida (.gif, .mp4)")
+    parser.add_argument("--seconds", type=float, default=None,
+                        help="duración del show en segundos (por defecto un ciclo completo)")
+    parser.add_argument("--width", type=int, default=EXPORT_WIDTH, help="ancho en píxeles")
+    parser.add_argument("--height", type=int, default=EXPORT_HEIGHT, help="alto en píxeles")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="procesos de render (por defecto, núcleos disponibles)")
+    parser.add_argument("--fps", type=int, default=GIF_FPS)
+    parser.add_argument("--record", metavar="FILE", default=None,
+                        help="simular --seconds y grabar la trayectoria (np.memmap) en FILE")
+    parser.add_argument("--replay", metavar="FILE", default=None,
+                        help="reproducir una trayectoria grabada en vez de simular")
+    parser.add_argument("--sweep", metavar="JSON", default=None,
+                        help="barrido de parámetros w/c1/c2/rep_k con enjambres en lote; guarda resultados en JSON")
+    parser.add_argument("--renderer", choices=["auto", "mplot3d", "fast"], default="auto",
+                        help="mplot3d (original) o fast (proyección propia + blitting, para miles de drones)")
+    parser.add_argument("--early-end", action="store_true",
+                        help="terminar cada fase cuando todo el enjambre convergió (tras el hold)")
+    parser.add_argument("--compile", action="store_true",
+                        help="precompilar el show (tablas por frame + reporte) antes de reproducirlo")
+    return parser.parse_args(argv)
+
 if __name__ == "__main__":
-    # keep reference in main scope
-    anim = run_animation()
+    args = parse_args()
+    if args.early_end:
+        EARLY_PHASE_END = True
+    if args.sweep:
+        import json
+        rows = sweep_parameters()
+        rows.sort(key=lambda r: (r["converged_frame"] < 0, r["collisions"], r["converged_frame"]))
+        with open(args.sweep, "w") as f:
+            json.dump(rows, f, indent=2)
+        for r in rows[:5]:
+            print(r)
+        print(f"{len(rows)} combinaciones guardadas en {args.sweep}")
+    elif args.record:
+        record_show(args.record, seconds_to_frames(args.seconds, build_phases()))
+        print(f"Trayectoria grabada: {args.record}")
+    else:
+        replay = args.replay
+        if args.compile:
+            phases = build_phases()
+            replay = compile_show(phases, seconds_to_frames(args.seconds, phases))
+            for r in replay.report:
+                print(f"{r['name']:>6} frame {r['start']:>5}: converge en "
+                      f"{r['converged_frame']}, sep. mínima {r['min_separation']:.2f}")
+            for problem in replay.problems():
+                print("AVISO:", problem)
+        if args.headless:
+            export_show(args.output, args.seconds, args.width, args.height, args.workers, args.fps,
+                        replay=replay, renderer=args.renderer)
+        else:
+            # keep reference in main scope
+            anim = run_animation(replay=replay, renderer=args.renderer)
@@ -0,0 +1,120 @@
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import pytest
+
+import main
+
+R = main.REPULSION_RADIUS
+
+def random_config(rng):
+    return rng.uniform(0, 300, (600, 3))
+
+def clustered_config(rng):
+    centers = rng.uniform(0, 500, (8, 3))
+    pos = centers[rng.integers(8, size=600)] + rng.normal(0, R / 2, (600, 3))
+    pos[:30] = pos[30:60]                          # coincident drones
+    return pos
+
+def boundary_config(rng):
+    # lattice with spacing exactly R (pairs at distance R are not neighbours),
+    # plus drones on cell faces and just inside / outside the radius
+    g = np.arange(6) * R
+    lattice = np.stack(np.meshgrid(g, g, g), axis=-1).reshape(-1, 3)
+    near = lattice[:50] + np.array([R * (1 - 1e-9), 0, 0])
+    far = lattice[50:100] + np.array([0, R * (1 + 1e-9), 0])
+    return np.concatenate([lattice, near, far])
+
+CONFIGS = [random_config, clustered_config, boundary_config]
+
+def brute_pairs(pos, radius):
+    i, j = np.triu_indices(len(pos), k=1)
+    d = np.linalg.norm(pos[i] - pos[j], axis=1)
+    close = d < radius
+    return i[close], j[close]
+
+def sorted_pairs(i, j):
+    a, b = np.minimum(i, j), np.maximum(i, j)
+    o = np.lexsort((b, a))
+    return a[o], b[o]
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_grid_pairs_match_brute(config):
+    pos = config(np.random.default_rng(0))
+    i, j, d = main.neighbor_pairs(pos, R)
+    gi, gj = sorted_pairs(i, j)
+    bi, bj = brute_pairs(pos, R)
+    assert np.array_equal(gi, bi) and np.array_equal(gj, bj)
+    assert np.allclose(d, np.linalg.norm(pos[i] - pos[j], axis=1))
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_grid_forces_match_brute(config):
+    pos = config(np.random.default_rng(1))
+    grid = main.repulsion_forces(pos, mode="grid")
+    brute = main.repulsion_forces(pos, mode="brute")
+    assert np.allclose(grid, brute, atol=1e-9)
+
+def test_replay_uses_recorded_drone_count(tmp_path):
+    n = 12                                        # anything but N_DRONES
+    phases = main.build_phases(n)
+    path = str(tmp_path / "show.traj")
+    main.record_show(path, 30, swarm=main.DroneSwarm3D(n), phases=phases)
+    traj = main.TrajectoryFile(path)
+    assert traj.n_drones == n
+    replayed = main.replay_phases(traj)
+    assert all(len(targets) == n for _, targets, _ in replayed)
+    main._render_init(160, 120, replayed)
+    frame = main._render_frame((int(traj.phase[0]), int(traj.frame_in_phase[0]), traj.pos[0]))
+    assert frame.shape == (120, 160, 3)
+
+def test_batched_swarm_independent_of_batch_position():
+    targets = main.formation_targets("robot", 40)
+    same = dict(w=0.6, c1=1.2, c2=1.6, rep_k=200.0)
+    alone = main.BatchedDroneSwarm3D(1, 40, seed=[7], **same).run(targets, n_frames=80)
+    batch = main.BatchedDroneSwarm3D(4, 40, w=[0.6, 0.4, 0.8, 0.6], c2=[1.6, 1.0, 2.2, 1.6],
+                                     seed=[7, 3, 7, 7], rep_k=200.0).run(targets, n_frames=80)
+    for k in (0, 3):
+        for name, value in alone.items():
+            assert np.array_equal(batch[name][k], value[0]), (name, k)
+
+def test_sweep_rows_do_not_depend_on_batch_size():
+    grid = {"w": [0.4, 0.6], "c2": [1.6], "rep_k": [200.0]}
+    targets = main.formation_targets("dragon", 40)
+    a = main.sweep_parameters(grid, targets, n_frames=60, seeds=(1, 2), batch_size=4)
+    b = main.sweep_parameters(grid, targets, n_frames=60, seeds=(1, 2), batch_size=1)
+    assert a == b
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_forces_for_subset_match_full(config):
+    pos = config(np.random.default_rng(2))
+    only = np.random.default_rng(3).choice(len(pos), 37, replace=False)
+    full = main.repulsion_forces(pos, mode="brute")
+    for mode in ("grid", "brute"):
+        assert np.allclose(main.repulsion_forces(pos, mode=mode, only=only), full[only], atol=1e-9)
+
+def test_fast_renderer_live_view_blits(monkeypatch):
+    import matplotlib.pyplot as plt
+    monkeypatch.setattr(plt, "show", lambda *a, **k: None)
+    ani = main.run_animation(renderer="fast")
+    try:
+        assert ani._blit
+        ani._init_draw()
+        for frame in range(2):
+            ani._draw_next_frame(frame, blit=True)
+    finally:
+        plt.close(ani._fig)
+
+def test_batched_run_ignores_unassigned_drones():
+    targets = main.formation_targets("robot", 40)
+    swarm = main.BatchedDroneSwarm3D(2, 40, seed=[1, 2])
+    assigned = swarm.assign(targets)
+    assigned[:, :5] = -1                                   # drones without a target hover
+    swarm.assign = lambda targets: assigned
+    has = assigned != -1
+    start = swarm.run(targets, n_frames=0)
+    expected = [np.linalg.norm(swarm.pos[b, has[b]] - targets[assigned[b, has[b]]], axis=1).max()
+                for b in range(2)]
+    assert np.allclose(start["final_max_error"], expected)
+    assert start["converged_frame"].tolist() == [-1, -1]
+    res = swarm.run(targets, n_frames=150)
+    assert (res["converged_frame"] >= 0).all()
@@ -0,0 +1,219 @@
+"""
+Barrido de parámetros de ACORescate (hormigas.py)
+- Grilla completa o búsqueda aleatoria sobre argumentos del constructor
+  (alpha, beta, evaporacion, q, n_drones, n_iteraciones, variante, ...) x semillas
+- Cada corrida es benchmark.correr (presupuesto fijo, sin imprimir) en un pool de procesos
+- Cada corrida terminada se agrega a un checkpoint JSONL; al relanzar con el mismo
+  checkpoint se saltan las ya hechas. La primera línea del checkpoint es una cabecera
+  con la instancia, el presupuesto y las opciones base: si no coincide, no se reanuda
+- Al final escribe una tabla CSV (una fila por corrida) y muestra las mejores configuraciones
+
+Uso:
+    python barrido.py --grilla alpha=0.5,1,2 beta=2,3,5 evaporacion=0.1,0.5 --semillas 0 1 2
+    python barrido.py --aleatorio 40 alpha=0.5:3 beta=1:6 evaporacion=0.05:0.9 variante=as,mmas,acs
+    python barrido.py --tsp tsplib/eil51.tsp --optimo 426 --grilla n_drones=10,20 --segundos 5
+"""
+
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import sys
+from multiprocessing import Pool, cpu_count
+
+import numpy as np
+
+import benchmark
+
+DEFAULT_PUNTOS = 200
+DEFAULT_ITERACIONES = 100
+COLUMNAS = ("iteraciones", "segundos", "iteraciones_por_segundo", "mejor_ruta_abierta", "mejor_tour",
+            "gap", "segundos_objetivo", "iteraciones_objetivo", "parada")
+
+def _valor(texto):
+    for tipo in (int, float):
+        try:
+            return tipo(texto)
+        except ValueError:
+            pass
+    return None if texto == "None" else texto
+
+def leer_espacio(especificaciones):
+    """["alpha=0.5,1,2", "beta=1:6"] -> {"alpha": [0.5, 1, 2], "beta": (1.0, 6.0)}.
+       Una lista son opciones; "a:b" es un rango uniforme (solo en búsqueda aleatoria)"""
+    espacio = {}
+    for espec in especificaciones:
+        nombre, _, valores = espec.partition("=")
+        if ":" in valores:
+            bajo, alto = valores.split(":")
+            espacio[nombre] = (float(bajo), float(alto))
+        else:
+            espacio[nombre] = [_valor(v) for v in valores.split(",")]
+    return espacio
+
+def configuraciones(espacio, n_aleatorias=0, semilla=0):
+    """Grilla completa (n_aleatorias=0) o n_aleatorias muestras reproducibles con la semilla"""
+    if not n_aleatorias:
+        if any(isinstance(v, tuple) for v in espacio.values()):
+            raise ValueError("los rangos a:b solo valen con --aleatorio")
+        nombres = list(espacio)
+        return [dict(zip(nombres, combinacion)) for combinacion in itertools.product(*espacio.values())]
+    rng = np.random.default_rng(semilla)
+    configs = []
+    for _ in range(n_aleatorias):
+        config = {}
+        for nombre, valores in espacio.items():
+            if isinstance(valores, tuple):
+                config[nombre] = round(float(rng.uniform(*valores)), 4)
+            else:
+                config[nombre] = valores[int(rng.integers(len(valores)))]
+        configs.append(config)
+    return configs
+
+def clave(config, semilla):
+    return json.dumps({"config": config, "semilla": semilla}, sort_keys=True)
+
+def cabecera(instancia, presupuesto, base):
+    """Lo que deben compartir las corridas de un checkpoint: instancia (nombre, tamaño y
+       huella de las coordenadas), presupuesto y opciones base, tal como queda en JSON"""
+    nombre, coords, tipo, optimo = instancia
+    huella = hashlib.sha1(np.ascontiguousarray(coords, dtype=np.float64).tobytes()).hexdigest()
+    segundos, iteraciones, gap_objetivo = presupuesto
+    return json.loads(json.dumps({
+        "instancia": {"nombre": nombre, "puntos": len(coords), "coords": huella, "tipo": tipo,
+                      "optimo": optimo},
+        "presupuesto": {"segundos": segundos, "iteraciones": iteraciones, "gap_objetivo": gap_objetivo},
+        "base": base}, sort_keys=True))
+
+def leer_checkpoint(ruta, esperada=None):
+    """Filas ya terminadas por clave (tolera una última línea cortada por una interrupción).
+       Con `esperada`, falla si la cabecera del checkpoint es otra (o si no tiene)"""
+    hechas = {}
+    if ruta and os.path.exists(ruta):
+        with open(ruta) as f:
+            for linea in f:
+                try:
+                    fila = json.loads(linea)
+                except json.JSONDecodeError:
+                    continue
+                if "cabecera" in fila:
+                    if esperada is not None and fila["cabecera"] != esperada:
+                        raise ValueError(f"{ruta} es de otro barrido (instancia, presupuesto u "
+                                         f"opciones base distintos); use otro --checkpoint")
+                    esperada = None
+                    continue
+                if esperada is not None:
+                    raise ValueError(f"{ruta} no tiene cabecera; use otro --checkpoint")
+                hechas[clave(fila["config"], fila["semilla"])] = fila
+    return hechas
+
+# Estado de cada proceso del pool (lo fija _barrido_init)
+_BARRIDO = {}
+
+def _barrido_init(instancia, presupuesto, base):
+    _BARRIDO.update(instancia=instancia, presupuesto=presupuesto, base=base)
+
+def _barrido_correr(tarea):
+    config, semilla = tarea
+    nombre, coords, tipo, optimo = _BARRIDO["instancia"]
+    segundos, iteraciones, gap_objetivo = _BARRIDO["presupuesto"]
+    opciones = {**_BARRIDO["base"], **config}
+    iteraciones = opciones.get("n_iteraciones", iteraciones)
+    fila = benchmark.correr(nombre, coords, tipo, optimo, semilla, segundos, iteraciones,
+                            gap_objetivo, opciones)
+    return {"config": config, "semilla": semilla, **fila}
+
+def barrer(instancia, configs, semillas, segundos=None, iteraciones=DEFAULT_ITERACIONES,
+           gap_objetivo=benchmark.GAP_OBJETIVO, base=None, procesos=None, checkpoint=None):
+    """Corre configs x semillas en un pool; devuelve todas las filas (incluidas las del checkpoint).
+       Un checkpoint de otra instancia, presupuesto u opciones base da ValueError"""
+    presupuesto = (segundos, iteraciones, gap_objetivo)
+    esperada = cabecera(instancia, presupuesto, base or {})
+    hechas = leer_checkpoint(checkpoint, esperada)
+    pendientes = [(c, s) for c in configs for s in semillas if clave(c, s) not in hechas]
+    filas = [hechas[clave(c, s)] for c in configs for s in semillas if clave(c, s) in hechas]
+    if pendientes:
+        with Pool(processes=min(procesos or cpu_count(), len(pendientes)), initializer=_barrido_init,
+                  initargs=(instancia, presupuesto, base or {})) as pool, \
+                open(checkpoint or os.devnull, "a") as f:
+            if not f.tell():
+                f.write(json.dumps({"cabecera": esperada}) + "\n")
+            for fila in pool.imap_unordered(_barrido_correr, pendientes):
+                f.write(json.dumps(fila) + "\n")
+                f.flush()
+                filas.append(fila)
+    return filas
+
+def escribir_tabla(filas, ruta):
+    """Una fila por corrida: parámetros de la configuración, semilla y resultados"""
+    parametros = sorted({p for fila in filas for p in fila["config"]})
+    with open(ruta, "w", newline="") as f:
+        escritor = csv.writer(f)
+        escritor.writerow(parametros + ["semilla"] + list(COLUMNAS))
+        for fila in sorted(filas, key=lambda r: (clave(r["config"], r["semilla"]))):
+            escritor.writerow([fila["config"].get(p) for p in parametros] + [fila["semilla"]] +
+                              [fila.get(c) for c in COLUMNAS])
+
+def resumir(filas):
+    """Media y desvío de la mejor ruta por configuración, de mejor a peor"""
+    grupos = {}
+    for fila in filas:
+        grupos.setdefault(json.dumps(fila["config"], sort_keys=True), []).append(fila)
+    resumen = []
+    for config, grupo in grupos.items():
+        tours = np.array([r["mejor_tour"] for r in grupo])
+        resumen.append({"config": json.loads(config), "corridas": len(grupo),
+                        "mejor_tour_media": float(tours.mean()), "mejor_tour_desvio": float(tours.std()),
+                        "iteraciones_por_segundo": float(np.mean([r["iteraciones_por_segundo"] for r in grupo]))})
+    return sorted(resumen, key=lambda r: r["mejor_tour_media"])
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Barrido de parámetros de ACORescate")
+    espacio = parser.add_mutually_exclusive_group(required=True)
+    espacio.add_argument("--grilla", nargs="+", metavar="PARAM=V1,V2", help="grilla completa")
+    espacio.add_argument("--aleatorio", type=int, metavar="N", help="N configuraciones al azar")
+    parser.add_argument("rangos", nargs="*", metavar="PARAM=A:B|V1,V2", help="espacio de --aleatorio")
+    parser.add_argument("--semillas", type=int, nargs="+", default=[0])
+    parser.add_argument("--semilla-busqueda", type=int, default=0, help="semilla de la búsqueda aleatoria")
+    parser.add_argument("--puntos", type=int, default=DEFAULT_PUNTOS, help="tamaño de la instancia sintética")
+    parser.add_argument("--semilla-instancia", type=int, default=0)
+    parser.add_argument("--tsp", default=None, help="instancia TSPLIB en lugar de la sintética")
+    parser.add_argument("--optimo", type=float, default=None, help="óptimo conocido de --tsp")
+    parser.add_argument("--segundos", type=float, default=None, help="presupuesto de reloj por corrida")
+    parser.add_argument("--iteraciones", type=int, default=None,
+                        help=f"presupuesto de iteraciones si la configuración no fija n_iteraciones "
+                             f"(por defecto {DEFAULT_ITERACIONES} sin --segundos)")
+    parser.add_argument("--procesos", type=int, default=None)
+    parser.add_argument("--checkpoint", default="barrido.jsonl")
+    parser.add_argument("--tabla", default="barrido.csv")
+    args = parser.parse_args(argv)
+    if args.segundos is None and args.iteraciones is None:
+        args.iteraciones = DEFAULT_ITERACIONES
+
+    if args.tsp:
+        nombre, coords, tipo = benchmark.leer_tsp(args.tsp)
+        instancia = (nombre, coords, tipo, args.optimo)
+    else:
+        instancia = benchmark.instancia_sintetica(args.puntos, args.semilla_instancia)
+    if args.grilla:
+        configs = configuraciones(leer_espacio(args.grilla))
+    else:
+        configs = configuraciones(leer_espacio(args.rangos), args.aleatorio, args.semilla_busqueda)
+
+    try:
+        filas = barrer(instancia, configs, args.semillas, args.segundos, args.iteraciones,
+                       procesos=args.procesos, checkpoint=args.checkpoint)
+    except ValueError as e:
+        parser.error(str(e))
+    escribir_tabla(filas, args.tabla)
+    print(f"{len(filas)} corridas ({len(configs)} configuraciones x {len(args.semillas)} semillas) "
+          f"en {args.tabla}")
+    for r in resumir(filas)[:5]:
+        print(f"  {r['mejor_tour_media']:12.2f} ± {r['mejor_tour_desvio']:8.2f}  "
+              f"{r['iteraciones_por_segundo']:8.1f} it/s  {r['config']}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
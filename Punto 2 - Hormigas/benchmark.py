@@ -0,0 +1,223 @@
+"""
+Benchmark de ACORescate (hormigas.py)
+- Instancias TSPLIB (.tsp de un directorio local) y sintéticas con semilla (100 -> 10k puntos)
+- Presupuesto fijo por corrida: segundos de reloj y/o iteraciones
+- Mide: tiempo e iteraciones hasta el objetivo, gap contra el óptimo conocido,
+  iteraciones/s y tiempo acumulado por fase (construcción, feromonas, métricas)
+- Sin impresiones ni gráficos durante las corridas; el resultado es un JSON
+
+La colonia construye rutas abiertas; para comparar con TSPLIB la mejor ruta se cierra
+y se mide con la métrica de la instancia (EUC_2D redondea, CEIL_2D, ATT, GEO).
+Los óptimos salen de `optimos.json` o `solutions` ("a280 : 2579") en el directorio.
+
+Uso:
+    python benchmark.py --sinteticos 100 1000 10000 --segundos 10 --output bench.json
+    python benchmark.py --tsplib ./tsplib --iteraciones 200 --semillas 0 1 2 --variante mmas
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import matplotlib
+matplotlib.use("Agg")   # hormigas importa pyplot; aquí nunca se grafica
+import numpy as np
+
+import hormigas
+
+DEFAULT_SINTETICOS = [100, 1000, 10000]
+LADO_SINTETICO = 1000.0
+GAP_OBJETIVO = 0.05       # objetivo: a menos de 5% del óptimo (o de la mejor final si no hay óptimo)
+METRICAS_TSPLIB = ("EUC_2D", "CEIL_2D", "ATT", "GEO")
+
+def leer_tsp(ruta):
+    """Lee un .tsp con NODE_COORD_SECTION. Devuelve (nombre, coords (n, 2), tipo de arista)"""
+    cabecera, filas = {}, []
+    with open(ruta) as f:
+        en_coordenadas = False
+        for linea in f:
+            linea = linea.strip()
+            if not linea or linea == "EOF":
+                continue
+            if en_coordenadas:
+                partes = linea.split()
+                if len(partes) < 3 or not partes[0].lstrip("-").isdigit():
+                    en_coordenadas = False      # otra sección (p. ej. DISPLAY_DATA_SECTION)
+                    continue
+                filas.append((float(partes[1]), float(partes[2])))
+            elif linea.startswith("NODE_COORD_SECTION"):
+                en_coordenadas = True
+            elif ":" in linea:
+                clave, valor = linea.split(":", 1)
+                cabecera[clave.strip().upper()] = valor.strip()
+    nombre = cabecera.get("NAME", os.path.splitext(os.path.basename(ruta))[0])
+    return nombre, np.array(filas, dtype=float).reshape(-1, 2), cabecera.get("EDGE_WEIGHT_TYPE", "EUC_2D")
+
+def leer_optimos(directorio):
+    """Óptimos conocidos por nombre de instancia: optimos.json o el archivo `solutions` de TSPLIB"""
+    optimos = {}
+    ruta_json = os.path.join(directorio, "optimos.json")
+    if os.path.exists(ruta_json):
+        with open(ruta_json) as f:
+            optimos.update({k: float(v) for k, v in json.load(f).items()})
+    ruta_txt = os.path.join(directorio, "solutions")
+    if os.path.exists(ruta_txt):
+        with open(ruta_txt) as f:
+            for linea in f:
+                partes = linea.replace(":", " ").split()
+                if len(partes) >= 2:
+                    try:
+                        optimos.setdefault(partes[0], float(partes[1]))
+                    except ValueError:
+                        pass
+    return optimos
+
+def _geo_radianes(v):
+    grados = np.trunc(v)
+    return np.pi * (grados + 5.0 * (v - grados) / 3.0) / 180.0
+
+def longitud_tour(coords, ids, tipo="EUC_2D"):
+    """Longitud del tour cerrado ids[0] -> ... -> ids[-1] -> ids[0] con la métrica TSPLIB"""
+    a, b = coords[ids], coords[np.roll(ids, -1)]
+    if tipo == "GEO":
+        lat_a, lon_a = _geo_radianes(a[:, 0]), _geo_radianes(a[:, 1])
+        lat_b, lon_b = _geo_radianes(b[:, 0]), _geo_radianes(b[:, 1])
+        q1 = np.cos(lon_a - lon_b)
+        q2 = np.cos(lat_a - lat_b)
+        q3 = np.cos(lat_a + lat_b)
+        d = np.floor(6378.388 * np.arccos(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3)) + 1.0)
+        return float(d.sum())
+    d2 = ((a - b) ** 2).sum(axis=1)
+    if tipo == "ATT":
+        r = np.sqrt(d2 / 10.0)
+        t = np.floor(r + 0.5)
+        return float(np.where(t < r, t + 1, t).sum())
+    d = np.sqrt(d2)
+    if tipo == "CEIL_2D":
+        return float(np.ceil(d).sum())
+    if tipo == "EUC_2D":
+        return float(np.floor(d + 0.5).sum())
+    return float(d.sum())
+
+def instancias_tsplib(directorio):
+    """[(nombre, coords, tipo, óptimo)] de los .tsp con métrica soportada"""
+    optimos = leer_optimos(directorio)
+    instancias, omitidas = [], []
+    for archivo in sorted(os.listdir(directorio)):
+        if not archivo.endswith(".tsp"):
+            continue
+        nombre, coords, tipo = leer_tsp(os.path.join(directorio, archivo))
+        if tipo not in METRICAS_TSPLIB or len(coords) < 3:
+            omitidas.append({"instancia": nombre, "motivo": f"EDGE_WEIGHT_TYPE {tipo} sin coordenadas"})
+            continue
+        instancias.append((nombre, coords, tipo, optimos.get(nombre)))
+    return instancias, omitidas
+
+def instancia_sintetica(n, semilla):
+    rng = np.random.default_rng([n, semilla])
+    return f"uniforme-{n}-s{semilla}", rng.uniform(0, LADO_SINTETICO, (n, 2)), "EUCLIDEA", None
+
+def correr(nombre, coords, tipo, optimo, semilla, segundos, iteraciones, gap_objetivo, opciones):
+    """Una corrida con presupuesto fijo. Devuelve la fila del reporte"""
+    t0 = time.perf_counter()
+    minimo = coords.min(axis=0)
+    ancho, alto = np.maximum(coords.max(axis=0) - minimo, 1.0)
+    aco = hormigas.ACORescate(ancho, alto, semilla=semilla, **opciones)
+    aco.cargar_terreno(coords, ["superviviente"] * len(coords))
+    preparacion = time.perf_counter() - t0
+
+    curva = []                  # (segundos, iteración, tour) cada vez que mejora
+    mejor = np.inf
+    t0 = time.perf_counter()
+    iteracion = 0
+    while (iteraciones is None or iteracion < iteraciones) and \
+            (segundos is None or time.perf_counter() - t0 < segundos):
+        anterior = aco.mejor_distancia_global
+        aco.iterar(iteracion)
+        iteracion += 1
+        if aco.mejor_distancia_global < anterior:
+            tour = longitud_tour(coords, aco.mejor_ids, tipo)
+            if tour < mejor:
+                mejor = tour
+                curva.append((time.perf_counter() - t0, iteracion, tour))
+        if aco.convergio():
+            break
+    duracion = time.perf_counter() - t0
+
+    referencia = optimo if optimo else mejor
+    objetivo = referencia * (1.0 + gap_objetivo)
+    llegada = next((c for c in curva if c[2] <= objetivo), None)
+    fases = aco.historial_metricas.resumen()
+    return {
+        "instancia": nombre, "n": len(coords), "metrica": tipo, "semilla": semilla,
+        "iteraciones": iteracion, "segundos": duracion, "segundos_preparacion": preparacion,
+        "iteraciones_por_segundo": iteracion / duracion if duracion > 0 else None,
+        "mejor_ruta_abierta": aco.mejor_distancia_global, "mejor_tour": mejor,
+        "optimo": optimo, "gap": mejor / optimo - 1.0 if optimo else None,
+        "objetivo": objetivo, "referencia_objetivo": "optimo" if optimo else "mejor_final",
+        "segundos_objetivo": llegada[0] if llegada else None,
+        "iteraciones_objetivo": llegada[1] if llegada else None,
+        "fases": {k: fases[k] for k in ("t_construccion_total", "t_feromonas_total", "t_metricas_total")},
+        "parada": aco.convergio(),
+    }
+
+def run_suite(instancias, semillas, segundos, iteraciones, gap_objetivo, opciones):
+    return [correr(*inst, semilla, segundos, iteraciones, gap_objetivo, opciones)
+            for inst in instancias for semilla in semillas]
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de ACORescate (TSPLIB y sintéticas)")
+    parser.add_argument("--tsplib", default=None, metavar="DIR", help="directorio con archivos .tsp")
+    parser.add_argument("--sinteticos", type=int, nargs="*", default=None,
+                        help=f"tamaños de instancias uniformes (por defecto {DEFAULT_SINTETICOS} sin --tsplib)")
+    parser.add_argument("--semillas", type=int, nargs="+", default=[0], help="semillas de la colonia")
+    parser.add_argument("--semilla-instancia", type=int, default=0, help="semilla de las instancias sintéticas")
+    parser.add_argument("--segundos", type=float, default=None, help="presupuesto de reloj por corrida")
+    parser.add_argument("--iteraciones", type=int, default=None, help="presupuesto de iteraciones por corrida")
+    parser.add_argument("--gap-objetivo", type=float, default=GAP_OBJETIVO)
+    parser.add_argument("--drones", type=int, default=hormigas.N_DRONES, help="hormigas por iteración")
+    parser.add_argument("--variante", choices=["as", "mmas", "acs"], default=hormigas.VARIANTE)
+    parser.add_argument("--candidatos", type=int, default=None)
+    parser.add_argument("--busqueda-local", choices=["mejor", "todas"], default=hormigas.BUSQUEDA_LOCAL)
+    parser.add_argument("--parada", action="store_true", help="permitir parada temprana por convergencia")
+    parser.add_argument("--output", default=None, help="archivo JSON (por defecto, salida estándar)")
+    args = parser.parse_args(argv)
+    if args.segundos is None and args.iteraciones is None:
+        args.segundos = 10.0
+
+    instancias, omitidas = [], []
+    if args.tsplib:
+        instancias, omitidas = instancias_tsplib(args.tsplib)
+    sinteticos = args.sinteticos if args.sinteticos is not None else ([] if args.tsplib else DEFAULT_SINTETICOS)
+    instancias += [instancia_sintetica(n, args.semilla_instancia) for n in sinteticos]
+
+    opciones = dict(n_drones=args.drones, candidatos=args.candidatos, busqueda_local=args.busqueda_local,
+                    variante=args.variante, parada_temprana=args.parada)
+    results = run_suite(instancias, args.semillas, args.segundos, args.iteraciones, args.gap_objetivo, opciones)
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "scipy": hormigas._cKDTree is not None,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "presupuesto": {"segundos": args.segundos, "iteraciones": args.iteraciones},
+            "gap_objetivo": args.gap_objetivo,
+            "opciones": opciones,
+        },
+        "results": results,
+        "omitidas": omitidas,
+    }
+    texto = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(texto)
+    else:
+        print(texto)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
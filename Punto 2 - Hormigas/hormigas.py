@@ -1,11 +1,18 @@
 import numpy as np
 import matplotlib.pyplot as plt
-import random
-from math import sqrt
-from typing import List, Tuple, Dict
+import time
+from collections import deque
+from math import hypot
+from typing import Callable, List
+
+try:
+    from scipy.spatial import cKDTree as _cKDTree
+except ImportError:
+    _cKDTree = None
 
 # Parámetros del algoritmo
 N_DRONES = 5
+N_HORMIGAS = 10           # hormigas por iteración en modo flota (no depende del tamaño de la flota)
 N_PUNTOS = 30
 N_ITERACIONES = 100
 EVAPORACION = 0.5
@@ -13,6 +20,30 @@ ALPHA = 1.0
 BETA = 2.0
 Q = 100
 
+# Listas de candidatos (k vecinos más cercanos) para instancias grandes
+CANDIDATOS = 15           # vecinos por punto
+DENSO_MAX = 2000          # hasta este tamaño se usan matrices densas n x n
+BLOQUE_KNN = 1024         # filas por bloque en la búsqueda kNN sin SciPy
+
+# Búsqueda local (2-opt + Or-opt) sobre las rutas construidas
+BUSQUEDA_LOCAL = None     # None | "mejor" (solo la mejor de la iteración) | "todas"
+VECINOS_BL = 10           # vecinos por punto que revisa la búsqueda local
+
+# Variantes de actualización de feromonas y parada temprana
+VARIANTE = "as"           # "as" (Ant System original) | "mmas" (MAX-MIN) | "acs" (Ant Colony System)
+P_MEJOR = 0.05            # MMAS: probabilidad de reconstruir la mejor ruta al converger (fija tau_min)
+MMAS_GLOBAL_CADA = 5      # MMAS: cada cuántas iteraciones deposita la mejor global en vez de la de la iteración
+Q0 = 0.9                  # ACS: probabilidad de elegir el mejor candidato (regla pseudoaleatoria proporcional)
+XI = 0.1                  # ACS: peso de la actualización local hacia tau0
+ESTANCAMIENTO = 25        # parada: iteraciones seguidas sin mejorar la mejor ruta
+RAMIFICACION_MIN = 2.05   # parada: factor de ramificación lambda medio por debajo del cual se considera convergido
+PACIENCIA_RAMIFICACION = 10  # ... siempre que además lleve estas iteraciones sin mejora
+LAMBDA_RAMIFICACION = 0.05
+
+# Modelo de islas (colonias en paralelo)
+MIGRACION_CADA = 10       # iteraciones entre migraciones
+MEZCLA_FEROMONAS = 0.0    # 0: solo migra la mejor ruta; >0: además mezcla feromonas con la media de las otras islas
+
 class Punto:
     def __init__(self, id: int, x: float, y: float, tipo: str):
         self.id = id
@@ -24,150 +55,948 @@ class Drone:
     def __init__(self, id: int):
         self.id = id
         self.ruta = []
+        self.indices = np.zeros(0, dtype=np.intp)   # ruta como ids de Punto
         self.distancia_recorrida = 0.0
         self.puntos_visitados = set()
 
+class Historial:
+    """Métricas por iteración en un arreglo NumPy preasignado (una columna por campo,
+       capacidad que se duplica). h[k] devuelve la fila k como dict; h.columna(c), una vista"""
+    CAMPOS = ('iteracion', 'cobertura', 'tiempo_total', 'mejor_distancia', 'total_puntos',
+              'hormigas', 't_construccion', 't_feromonas', 't_metricas')
+    ENTEROS = ('iteracion', 'total_puntos', 'hormigas')
+
+    def __init__(self, capacidad: int = N_ITERACIONES):
+        self._datos = np.zeros((max(capacidad, 1), len(self.CAMPOS)))
+        self.n = 0
+
+    def agregar(self, **valores) -> int:
+        """Agrega una fila (campos omitidos = 0) y devuelve su índice"""
+        if self.n == len(self._datos):
+            self._datos = np.concatenate([self._datos, np.zeros_like(self._datos)])
+        fila = self._datos[self.n]
+        for campo, valor in valores.items():
+            fila[self.CAMPOS.index(campo)] = valor
+        self.n += 1
+        return self.n - 1
+
+    def columna(self, campo: str) -> np.ndarray:
+        return self._datos[:self.n, self.CAMPOS.index(campo)]
+
+    def __len__(self):
+        return self.n
+
+    def __getitem__(self, k: int) -> dict:
+        fila = self._datos[:self.n][k]
+        return {c: int(v) if c in self.ENTEROS else float(v) for c, v in zip(self.CAMPOS, fila)}
+
+    def __iter__(self):
+        return (self[k] for k in range(self.n))
+
+    def resumen(self) -> dict:
+        """Última fila más los tiempos acumulados por fase"""
+        resumen = self[-1] if self.n else {}
+        for campo in ('t_construccion', 't_feromonas', 't_metricas'):
+            resumen[campo + '_total'] = float(self.columna(campo).sum())
+        return resumen
+
+    def exportar(self, ruta: str, **extra):
+        """Guarda las métricas en .csv (una fila por iteración) o .npz (una columna por
+           campo, más los arreglos de `extra`, p. ej. la mejor ruta como ids)"""
+        if ruta.endswith('.npz'):
+            np.savez(ruta, **{c: self.columna(c) for c in self.CAMPOS}, **extra)
+        else:
+            fmt = ['%d' if c in self.ENTEROS else '%.6g' for c in self.CAMPOS]
+            np.savetxt(ruta, self._datos[:self.n], delimiter=',', fmt=fmt,
+                       header=','.join(self.CAMPOS), comments='')
+
+def vecinos_cercanos(coords: np.ndarray, k: int):
+    """k vecinos más cercanos de cada punto (sin incluirse a sí mismo), ordenados
+       por distancia -> (ids (n, k), distancias (n, k)). KD-tree si hay SciPy; si no,
+       búsqueda por bloques de BLOQUE_KNN filas (memoria acotada)."""
+    n = len(coords)
+    k = min(k, n - 1)
+    kq = k + 1
+    if _cKDTree is not None:
+        dist, idx = _cKDTree(coords).query(coords, k=kq)
+        dist, idx = dist.reshape(n, kq), idx.reshape(n, kq)
+    else:
+        dist = np.empty((n, kq))
+        idx = np.empty((n, kq), dtype=np.intp)
+        for s in range(0, n, BLOQUE_KNN):
+            D = ACORescate._distancias_desde(coords[s:s+BLOQUE_KNN], coords)
+            part = np.argpartition(D, kq - 1, axis=1)[:, :kq] if kq < n else np.tile(np.arange(n), (len(D), 1))
+            pd = np.take_along_axis(D, part, axis=1)
+            orden = np.argsort(pd, axis=1)
+            idx[s:s+BLOQUE_KNN] = np.take_along_axis(part, orden, axis=1)
+            dist[s:s+BLOQUE_KNN] = np.take_along_axis(pd, orden, axis=1)
+    # quitar el propio punto (con puntos repetidos puede no estar en la primera columna)
+    otro = idx != np.arange(n)[:, None]
+    orden = np.argsort(~otro, axis=1, kind='stable')[:, :k]
+    return np.take_along_axis(idx, orden, axis=1), np.take_along_axis(dist, orden, axis=1)
+
+def busqueda_local(ruta: np.ndarray, coords: np.ndarray, vecinos: np.ndarray, or_opt: bool = True):
+    """Mejora una ruta abierta con 2-opt y Or-opt (segmentos de 1 a 3 puntos).
+       La ruta puede cubrir solo parte de los puntos (p. ej. la de un drone de la flota).
+       Solo prueba movimientos que unen un punto con uno de sus `vecinos` (ordenados
+       por distancia) y usa don't-look bits: un punto se vuelve a revisar solo si
+       cambió alguna de sus aristas. Devuelve (ruta, longitud)."""
+    t = [int(c) for c in ruta]
+    n = len(t)
+    pos = [-1] * len(coords)             # -1: el punto no está en esta ruta
+    for i, c in enumerate(t):
+        pos[c] = i
+    X, Y = coords[:, 0].tolist(), coords[:, 1].tolist()
+    vec = vecinos.tolist()
+
+    def d(a, b):
+        if a is None or b is None:       # extremo de la ruta abierta
+            return 0.0
+        return hypot(X[a] - X[b], Y[a] - Y[b])
+
+    def en(i):
+        return t[i] if 0 <= i < n else None
+
+    def revertir(i, j):
+        t[i:j+1] = t[i:j+1][::-1]
+        for k in range(i, j + 1):
+            pos[t[k]] = k
+
+    activo = [True] * len(coords)
+    cola = deque(t)
+
+    def despertar(*puntos):
+        for c in puntos:
+            if c is not None and not activo[c]:
+                activo[c] = True
+                cola.append(c)
+
+    def mejorar_2opt(a):
+        i = pos[a]
+        for sentido in (1, -1):
+            b = en(i + sentido)
+            dab = d(a, b)
+            for c in vec[a]:
+                dac = d(a, c)
+                if dac >= dab:
+                    break
+                j = pos[c]
+                if j < 0:
+                    continue
+                e = en(j + sentido)
+                if c == b or e == a:
+                    continue
+                # aristas (a,b) y (c,e) -> (a,c) y (b,e)
+                if dab + d(c, e) - dac - d(b, e) > 1e-10:
+                    if sentido == 1:
+                        revertir(i + 1, j) if i < j else revertir(j + 1, i)
+                    else:
+                        revertir(i, j - 1) if i < j else revertir(j, i - 1)
+                    despertar(a, b, c, e)
+                    return True
+        return False
+
+    def mover_segmento(a):
+        i = pos[a]
+        for largo in (1, 2, 3):
+            if i + largo > n:
+                break
+            s0, sl = t[i], t[i + largo - 1]
+            p, nx = en(i - 1), en(i + largo)
+            quitar = d(p, s0) + d(sl, nx) - d(p, nx)
+            if quitar <= 1e-10:
+                continue
+            for c in vec[a]:
+                j = pos[c]
+                if j < 0 or i <= j < i + largo:
+                    continue
+                # detrás de c: c s0..sl e   |   delante de c: e sl..s0 c
+                for detras in (True, False):
+                    e = en(j + 1) if detras else en(j - 1)
+                    if e is not None and i <= pos[e] < i + largo:
+                        continue
+                    if detras:
+                        costo = d(c, s0) + d(sl, e) - d(c, e)
+                    else:
+                        costo = d(e, sl) + d(s0, c) - d(e, c)
+                    if quitar - costo > 1e-10:
+                        segmento = t[i:i + largo]
+                        resto = t[:i] + t[i + largo:]
+                        k = j if j < i else j - largo      # posición de c en `resto`
+                        if detras:
+                            t[:] = resto[:k + 1] + segmento + resto[k + 1:]
+                        else:
+                            t[:] = resto[:k] + segmento[::-1] + resto[k:]
+                        for q in range(max(min(i, j) - 1, 0), min(max(i, j) + largo + 1, n)):
+                            pos[t[q]] = q
+                        despertar(p, nx, s0, sl, c, e)
+                        return True
+        return False
+
+    while cola:
+        a = cola.popleft()
+        activo[a] = False
+        if mejorar_2opt(a) or (or_opt and mover_segmento(a)):
+            despertar(a)
+
+    ruta = np.array(t, dtype=np.intp)
+    d_tramos = coords[ruta[1:]] - coords[ruta[:-1]]
+    return ruta, float(np.sqrt((d_tramos**2).sum(axis=1)).sum())
+
+def dividir_ruta(tramos: np.ndarray, m: int):
+    """Corta una ruta abierta (longitudes de sus n-1 tramos) en a lo sumo m trozos
+       contiguos minimizando el más largo; los tramos cortados no se recorren.
+       Bisección sobre el makespan con un corte voraz por búsqueda binaria en las
+       sumas acumuladas. Devuelve (inicio de cada trozo, makespan)."""
+    n = len(tramos) + 1
+    acumulada = np.concatenate([[0.0], np.cumsum(tramos)])
+
+    def cortar(limite):
+        inicios, s = [], 0
+        while s < n and len(inicios) <= m:
+            inicios.append(s)
+            s = int(np.searchsorted(acumulada, acumulada[s] + limite, side='right'))
+        return inicios
+
+    def makespan(inicios):
+        fines = inicios[1:] + [n]
+        return max(acumulada[f - 1] - acumulada[s] for s, f in zip(inicios, fines))
+
+    if m <= 1 or n <= 1:
+        return [0], float(acumulada[-1])
+    lo, hi = 0.0, float(acumulada[-1])
+    for _ in range(60):
+        medio = 0.5 * (lo + hi)
+        if len(cortar(medio)) <= m:
+            hi = medio
+        else:
+            lo = medio
+        if hi - lo <= 1e-9 * max(hi, 1.0):
+            break
+    inicios = cortar(hi)
+    return inicios, float(makespan(inicios))
+
 class ACORescate:
-    def __init__(self, ancho: float, alto: float):
+    def __init__(self, ancho: float, alto: float, n_drones: int = N_DRONES, semilla=None,
+                 candidatos: int = None, busqueda_local: str = BUSQUEDA_LOCAL, flota: bool = False,
+                 variante: str = VARIANTE, parada_temprana: bool = False,
+                 monitor: Callable[[dict], None] = None, alpha: float = ALPHA, beta: float = BETA,
+                 evaporacion: float = EVAPORACION, q: float = Q, n_iteraciones: int = N_ITERACIONES,
+                 n_puntos: int = N_PUNTOS, n_hormigas: int = None):
         self.ancho = ancho
         self.alto = alto
+        # Parámetros del algoritmo (por defecto, las constantes del módulo)
+        self.alpha = alpha
+        self.beta = beta
+        self.evaporacion = evaporacion
+        self.q = q
+        self.n_iteraciones = n_iteraciones
+        self.n_puntos = n_puntos
+        # Hormigas por iteración: None = una por drone (sin flota) o N_HORMIGAS (con flota)
+        self.n_hormigas = n_hormigas
+        self.rng = np.random.default_rng(semilla)
         self.puntos = []
-        self.feromonas = {}
-        self.drones = [Drone(i) for i in range(N_DRONES)]
-        self.mejor_ruta_global = None
+        # candidatos: None = automático (listas de vecinos si n > DENSO_MAX), 0 = siempre denso
+        self.candidatos = candidatos
+        self.vecinos = None                  # (n, k) ids de candidatos; None en modo denso
+        self.busqueda_local = busqueda_local
+        # flota=True: los drones se reparten los puntos (mTSP) y se minimiza el makespan;
+        # mejor_distancia_global pasa a ser el makespan y mejor_trozos guarda la ruta de cada drone
+        self.flota = flota
+        self.variante = variante
+        self.parada_temprana = parada_temprana
+        self._tau0 = None                    # ACS: feromona inicial / de la actualización local
+        self._limites = None                 # MMAS: (tau_min, tau_max)
+        self._iteraciones = 0
+        self._sin_mejora = 0
+        self._vecinos_bl = None              # listas de vecinos de la búsqueda local (perezosas)
+        # Matrices indexadas por Punto.id: densas (n x n) o, con candidatos, (n x k).
+        # Son vistas de buffers con capacidad extra (ver _reservar)
+        self._adoptar(np.zeros((0, 2)), np.zeros((0, 0)), np.zeros((0, 0)), np.zeros((0, 0)), None)
+        self.drones = [Drone(i) for i in range(n_drones)]
+        # Mejor solución como arreglos de ids (mejor_ruta_global / mejor_flota la dan como Puntos)
+        self.mejor_ids = None
+        self.mejor_trozos = None             # modo flota: un arreglo de ids por drone
         self.mejor_distancia_global = float('inf')
-        self.historial_metricas = []
-        
+        self.historial_metricas = Historial(n_iteraciones)
+        # monitor(metricas): se llama al final de cada iteración (métricas y tiempos por fase)
+        self.monitor = monitor
+
+    def hormigas(self) -> int:
+        """Tamaño de la colonia. En modo flota es fijo, así el esfuerzo de búsqueda por
+           iteración no cambia con el número de drones"""
+        if self.n_hormigas is not None:
+            return self.n_hormigas
+        return N_HORMIGAS if self.flota else len(self.drones)
+
+    @property
+    def mejor_ruta_global(self) -> List[Punto]:
+        return [] if self.mejor_ids is None else [self.puntos[i] for i in self.mejor_ids]
+
+    @property
+    def mejor_flota(self) -> List[List[Punto]]:
+        if self.mejor_trozos is None:
+            return None
+        return [[self.puntos[i] for i in t] for t in self.mejor_trozos]
+
     def generar_terreno(self):
         """Genera puntos aleatorios de supervivientes y recursos"""
         self.puntos = []
-        for i in range(N_PUNTOS):
-            x = random.uniform(0, self.ancho)
-            y = random.uniform(0, self.alto)
-            tipo = 'superviviente' if random.random() > 0.3 else 'recurso'
+        for i in range(self.n_puntos):
+            x = self.rng.uniform(0, self.ancho)
+            y = self.rng.uniform(0, self.alto)
+            tipo = 'superviviente' if self.rng.random() > 0.3 else 'recurso'
             self.puntos.append(Punto(i, x, y, tipo))
-            
-        # Inicializar matriz de feromonas
-        for i in range(len(self.puntos)):
-            for j in range(i+1, len(self.puntos)):
-                self.feromonas[(i,j)] = 1.0
-                self.feromonas[(j,i)] = 1.0
+
+        # Inicializar matrices de distancias, heurística y feromonas
+        self.construir_matrices()
+
+    def cargar_terreno(self, coords: np.ndarray, tipos: List[str]):
+        """Usa un terreno dado (coordenadas (n, 2) y tipo de cada punto)"""
+        self.puntos = [Punto(i, float(x), float(y), t) for i, ((x, y), t) in enumerate(zip(coords, tipos))]
+        self.construir_matrices()
+
+    def construir_matrices(self):
+        """Precalcula distancias, heurística (1/d)**beta y feromonas (todas 1.0)"""
+        n = len(self.puntos)
+        self.coords = np.array([(p.x, p.y) for p in self.puntos], dtype=float).reshape(n, 2)
+        k = self._k_candidatos(n)
+        self._vecinos_bl = None
+        if k:
+            # Solo las aristas hacia los k vecinos: memoria y tiempo O(n*k)
+            vecinos, distancias = vecinos_cercanos(self.coords, k)
+            self._adoptar(self.coords, distancias, self._heuristica(distancias),
+                          np.full_like(distancias, self.feromona_inicial()), vecinos)
+            return
+        distancias = self._distancias_desde(self.coords, self.coords)
+        feromonas = np.full((n, n), self.feromona_inicial())
+        np.fill_diagonal(feromonas, 0.0)
+        self._adoptar(self.coords, distancias, self._heuristica(distancias), feromonas, None)
+
+    # --- Almacenamiento con capacidad (crece duplicando, como una lista) ---
+
+    def _adoptar(self, coords, distancias, heuristica, feromonas, vecinos):
+        """Toma arreglos ya construidos como buffers (capacidad = tamaño actual)"""
+        self._buf = {'coords': coords, 'distancias': distancias, 'heuristica': heuristica,
+                     'feromonas': feromonas}
+        if vecinos is not None:
+            self._buf['vecinos'] = vecinos
+        self._capacidad = len(coords)
+        self._vistas()
+
+    def _vistas(self):
+        """self.coords, self.distancias, ... = vistas de los primeros n elementos de los buffers"""
+        n = len(self.puntos)
+        b = self._buf
+        self.coords = b['coords'][:n]
+        self.vecinos = b['vecinos'][:n] if 'vecinos' in b else None
+        if self.vecinos is None:
+            self.distancias, self.heuristica, self.feromonas = (
+                b[k][:n, :n] for k in ('distancias', 'heuristica', 'feromonas'))
+        else:
+            self.distancias, self.heuristica, self.feromonas = (
+                b[k][:n] for k in ('distancias', 'heuristica', 'feromonas'))
+        self._vecinos_bl = None
+
+    def _reservar(self, n: int):
+        """Garantiza capacidad para n puntos; si falta, duplica (costo amortizado O(1) por punto)"""
+        if n <= self._capacidad:
+            return
+        cap = max(2 * self._capacidad, n, 16)
+        usados = len(self.coords)
+        for nombre, viejo in self._buf.items():
+            if nombre in ('coords', 'vecinos') or self.vecinos is not None:
+                nuevo = np.zeros((cap,) + viejo.shape[1:], dtype=viejo.dtype)
+                nuevo[:usados] = viejo[:usados]
+            else:
+                nuevo = np.zeros((cap, cap), dtype=viejo.dtype)
+                nuevo[:usados, :usados] = viejo[:usados, :usados]
+            self._buf[nombre] = nuevo
+        self._capacidad = cap
+
+    def _k_candidatos(self, n: int) -> int:
+        if self.candidatos is None:
+            return min(CANDIDATOS, n - 1) if n > DENSO_MAX else 0
+        return min(self.candidatos, n - 1)
+
+    @staticmethod
+    def _distancias_desde(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        diff = a[:, None, :] - b[None, :, :]
+        return np.sqrt((diff**2).sum(axis=-1))
+
+    def _heuristica(self, distancias: np.ndarray) -> np.ndarray:
+        """eta**beta con eta = 1/d (d acotada para puntos coincidentes); 0 en la diagonal"""
+        eta = (1.0 / np.maximum(distancias, 1e-9)) ** self.beta
+        if eta.ndim == 2 and eta.shape[0] == eta.shape[1]:
+            np.fill_diagonal(eta, 0.0)
+        return eta
 
     def distancia(self, p1: Punto, p2: Punto) -> float:
-        """Calcula distancia euclidiana entre dos puntos"""
-        return sqrt((p1.x - p2.x)**2 + (p1.y - p2.y)**2)
+        """Distancia euclidiana entre dos puntos (consulta a la matriz precalculada)"""
+        if self.vecinos is None:
+            return float(self.distancias[p1.id, p2.id])
+        return float(np.hypot(p1.x - p2.x, p1.y - p2.y))
 
-    def calcular_probabilidades(self, punto_actual: Punto, drones: Drone) -> List[float]:
-        """Calcula probabilidades de transición a otros puntos"""
-        probabilidades = []
-        puntos_no_visitados = [p for p in self.puntos if p.id not in drones.puntos_visitados]
-        
-        if not puntos_no_visitados:
-            return []
-            
-        for punto in puntos_no_visitados:
-            feromona = self.feromonas.get((punto_actual.id, punto.id), 1.0)
-            distancia = self.distancia(punto_actual, punto)
-            atraccion = (feromona ** ALPHA) * ((1.0/distancia) ** BETA)
-            probabilidades.append(atraccion)
-            
-        total = sum(probabilidades)
-        return [p/total for p in probabilidades] if total > 0 else [1.0/len(probabilidades)]*len(probabilidades)
+    def tramos(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Longitudes de los tramos a[i] -> b[i]"""
+        if self.vecinos is None:
+            return self.distancias[a, b]
+        d = self.coords[a] - self.coords[b]
+        return np.sqrt((d**2).sum(axis=-1))
+
+    def longitud_ruta(self, ids: np.ndarray) -> float:
+        return float(self.tramos(ids[:-1], ids[1:]).sum())
+
+    def calcular_probabilidades(self, punto_actual: Punto, drones: Drone) -> np.ndarray:
+        """Probabilidades de transición hacia los puntos no visitados (en orden de id)"""
+        no_visitado = np.ones(len(self.puntos), dtype=bool)
+        no_visitado[list(drones.puntos_visitados)] = False
+        return self._probabilidades_fila(punto_actual.id, no_visitado)[no_visitado]
+
+    def _probabilidades_fila(self, actual: int, no_visitado: np.ndarray) -> np.ndarray:
+        """Vector (n,) de probabilidades enmascarado: 0 en los puntos ya visitados"""
+        if self.vecinos is None:
+            atraccion = self.feromonas[actual] ** self.alpha * self.heuristica[actual]
+        else:
+            atraccion = np.zeros(len(self.puntos))
+            atraccion[self.vecinos[actual]] = self.feromonas[actual] ** self.alpha * self.heuristica[actual]
+        atraccion = np.where(no_visitado, atraccion, 0.0)
+        total = atraccion.sum()
+        if total > 0:
+            return atraccion / total
+        return no_visitado / no_visitado.sum()
+
+    def construir_colonia(self, n_hormigas: int, voraz: bool = False):
+        """Construye n_hormigas rutas a la vez. Devuelve (rutas (m, n) de ids, longitudes (m,)).
+           voraz=True: siempre el punto más atractivo (sin azar ni actualización local)"""
+        if self.vecinos is not None:
+            return self._construir_colonia_candidatos(n_hormigas, voraz)
+        n = len(self.puntos)
+        m = n_hormigas
+        filas = np.arange(m)
+        rutas = np.empty((m, n), dtype=np.intp)
+        longitudes = np.zeros(m)
+        actual = self.rng.integers(n, size=m)
+        no_visitado = np.ones((m, n), dtype=bool)
+        no_visitado[filas, actual] = False
+        rutas[:, 0] = actual
+        # Atracción tau**alpha * eta**beta: una sola vez por iteración
+        atraccion = self.feromonas ** self.alpha * self.heuristica
+
+        for paso in range(1, n):
+            pesos = atraccion[actual] * no_visitado
+            acumulada = np.cumsum(pesos, axis=1)
+            total = acumulada[:, -1]
+            # Ruleta en lote: primer índice cuya suma acumulada supera r
+            r = self.rng.random(m) * total
+            siguiente = np.minimum((acumulada <= r[:, None]).sum(axis=1), n - 1)
+            explotar = self._explotar(m, voraz) & (total > 0)
+            if explotar.any():
+                siguiente[explotar] = pesos[explotar].argmax(axis=1)
+            malos = (total <= 0) | ~no_visitado[filas, siguiente]
+            if malos.any():   # sin atracción o borde numérico: uniforme entre los no visitados
+                azar = self.rng.random((malos.sum(), n)) * no_visitado[malos]
+                siguiente[malos] = azar.argmax(axis=1)
+            longitudes += self.distancias[actual, siguiente]
+            no_visitado[filas, siguiente] = False
+            rutas[:, paso] = siguiente
+            if self.variante == "acs" and not voraz:
+                self._actualizacion_local(actual, siguiente, atraccion)
+            actual = siguiente
+        return rutas, longitudes
+
+    def _explotar(self, m: int, voraz: bool) -> np.ndarray:
+        """Hormigas que en este paso toman el mejor candidato en vez de la ruleta"""
+        if voraz:
+            return np.ones(m, dtype=bool)
+        if self.variante == "acs":
+            return self.rng.random(m) < Q0
+        return np.zeros(m, dtype=bool)
+
+    def _actualizacion_local(self, a: np.ndarray, b: np.ndarray, atraccion: np.ndarray):
+        """ACS: cada arista recién recorrida se acerca a tau0 (y se refresca su atracción)"""
+        self._mezclar(a, b, XI, self._tau0)
+        for filas in (a, b):
+            atraccion[filas] = self.feromonas[filas] ** self.alpha * self.heuristica[filas]
+
+    def _construir_colonia_candidatos(self, m: int, voraz: bool = False):
+        """Como construir_colonia, pero cada paso solo mira los k candidatos del punto
+           actual; si todos están visitados, va al no visitado más cercano."""
+        n, k = self.vecinos.shape
+        filas = np.arange(m)
+        rutas = np.empty((m, n), dtype=np.intp)
+        longitudes = np.zeros(m)
+        actual = self.rng.integers(n, size=m)
+        no_visitado = np.ones((m, n), dtype=bool)
+        no_visitado[filas, actual] = False
+        rutas[:, 0] = actual
+        atraccion = self.feromonas ** self.alpha * self.heuristica   # (n, k)
+
+        for paso in range(1, n):
+            cand = self.vecinos[actual]                          # (m, k)
+            pesos = atraccion[actual] * no_visitado[filas[:, None], cand]
+            acumulada = np.cumsum(pesos, axis=1)
+            total = acumulada[:, -1]
+            r = self.rng.random(m) * total
+            eleccion = np.minimum((acumulada <= r[:, None]).sum(axis=1), k - 1)
+            eleccion = np.where(pesos[filas, eleccion] > 0, eleccion, pesos.argmax(axis=1))
+            explotar = self._explotar(m, voraz)
+            eleccion[explotar] = pesos[explotar].argmax(axis=1)
+            siguiente = cand[filas, eleccion]
+            for h in np.flatnonzero(total <= 0):
+                # Candidatos agotados: el no visitado más cercano de todo el conjunto
+                libres = np.flatnonzero(no_visitado[h])
+                d = self.coords[libres] - self.coords[actual[h]]
+                siguiente[h] = libres[np.argmin((d**2).sum(axis=1))]
+            longitudes += self.tramos(actual, siguiente)
+            no_visitado[filas, siguiente] = False
+            rutas[:, paso] = siguiente
+            if self.variante == "acs" and not voraz:
+                self._actualizacion_local(actual, siguiente, atraccion)
+            actual = siguiente
+        return rutas, longitudes
+
+    def mejorar_rutas(self, rutas: np.ndarray, longitudes: np.ndarray):
+        """Aplica busqueda_local (en el lugar) a la mejor ruta o a todas, según self.busqueda_local"""
+        elegidas = range(len(rutas)) if self.busqueda_local == "todas" else [int(np.argmin(longitudes))]
+        for h in elegidas:
+            rutas[h], longitudes[h] = busqueda_local(rutas[h], self.coords, self._vecinos_busqueda())
+
+    def _vecinos_busqueda(self) -> np.ndarray:
+        if self._vecinos_bl is None:
+            if self.vecinos is not None and self.vecinos.shape[1] >= VECINOS_BL:
+                self._vecinos_bl = self.vecinos[:, :VECINOS_BL]
+            else:
+                self._vecinos_bl = vecinos_cercanos(self.coords, VECINOS_BL)[0]
+        return self._vecinos_bl
+
+    def asignar_rutas(self, rutas: np.ndarray, longitudes: np.ndarray):
+        """Copia las rutas construidas a los objetos Drone"""
+        for drone, indices, longitud in zip(self.drones, rutas, longitudes):
+            self._cargar_ruta(drone, indices, longitud)
+
+    def _cargar_ruta(self, drone: Drone, indices: np.ndarray, longitud: float):
+        drone.indices = indices
+        drone.ruta = [self.puntos[i] for i in indices]
+        drone.puntos_visitados = set(indices.tolist())
+        drone.distancia_recorrida = float(longitud)
 
     def explorar_ruta(self, drone: Drone):
         """Explora una ruta para un drone"""
-        punto_actual = random.choice(self.puntos)
-        drone.ruta = [punto_actual]
-        drone.puntos_visitados = {punto_actual.id}
-        drone.distancia_recorrida = 0.0
-        
-        while len(drone.puntos_visitados) < len(self.puntos):
-            puntos_no_visitados = [p for p in self.puntos if p.id not in drone.puntos_visitados]
-            if not puntos_no_visitados:
-                break
-                
-            probabilidades = self.calcular_probabilidades(punto_actual, drone)
-            
-            if probabilidades:
-                siguiente_punto = random.choices(puntos_no_visitados, weights=probabilidades)[0]
-                drone.distancia_recorrida += self.distancia(punto_actual, siguiente_punto)
-                drone.ruta.append(siguiente_punto)
-                drone.puntos_visitados.add(siguiente_punto.id)
-                punto_actual = siguiente_punto
-
-    def actualizar_feromonas(self):
-        """Actualiza feromonas basado en las rutas encontradas"""
+        rutas, longitudes = self.construir_colonia(1)
+        self._cargar_ruta(drone, rutas[0], longitudes[0])
+
+    def actualizar_feromonas(self, soluciones=None):
+        """Actualiza feromonas basado en las rutas encontradas.
+           soluciones: lista de (valor, trozos) de la iteración; por defecto, la ruta de cada drone"""
+        if soluciones is None:
+            soluciones = [(d.distancia_recorrida, [d.indices]) for d in self.drones
+                          if len(d.indices) > 1 and d.distancia_recorrida > 0]
+            if soluciones:
+                self.registrar_mejor(soluciones)
+        if not soluciones:
+            return
+        self._iteraciones += 1
+
+        if self.variante == "acs":
+            # Solo la mejor global: evaporación y depósito sobre sus aristas
+            valor, trozos = self._mejor_solucion()
+            for t in trozos:
+                self._mezclar(t[:-1], t[1:], self.evaporacion, self.q / valor)
+            return
+
         # Evaporación
-        for key in self.feromonas:
-            self.feromonas[key] *= (1.0 - EVAPORACION)
-            
-        # Depositar feromonas
-        for drone in self.drones:
-            for i in range(len(drone.ruta)-1):
-                p1, p2 = drone.ruta[i], drone.ruta[i+1]
-                key = (p1.id, p2.id)
-                self.feromonas[key] += Q / drone.distancia_recorrida
-                self.feromonas[(key[1], key[0])] += Q / drone.distancia_recorrida
+        self.feromonas *= (1.0 - self.evaporacion)
+
+        if self.variante == "mmas":
+            tau_min, tau_max = self._limites_mmas()
+            if self._limites is None:
+                self._llenar(tau_max)           # MMAS arranca en el límite superior
+            self._limites = (tau_min, tau_max)
+            # Solo deposita una ruta: la mejor de la iteración o, cada tanto, la mejor global
+            if self._iteraciones % MMAS_GLOBAL_CADA == 0:
+                soluciones = [self._mejor_solucion()]
+            else:
+                soluciones = [min(soluciones, key=lambda sol: sol[0])]
+
+        # Depositar feromonas (simétrico) sobre las aristas de cada ruta
+        for valor, trozos in soluciones:
+            for t in trozos:
+                if len(t) > 1 and valor > 0:
+                    self.depositar(t, self.q / valor)
+
+        if self.variante == "mmas":
+            np.clip(self.feromonas, *self._limites, out=self.feromonas)
+            if self.vecinos is None:
+                np.fill_diagonal(self.feromonas, 0.0)
+
+    def _limites_mmas(self):
+        """tau_max = Q / (rho * L_mejor); tau_min según P_MEJOR (Stützle & Hoos)"""
+        n = len(self.puntos)
+        tau_max = self.q / (self.evaporacion * self.mejor_distancia_global)
+        raiz = P_MEJOR ** (1.0 / max(n, 1))
+        opciones = max((self.vecinos.shape[1] if self.vecinos is not None else n) / 2.0, 2.0)
+        tau_min = tau_max * (1.0 - raiz) / ((opciones - 1.0) * raiz)
+        return min(tau_min, tau_max), tau_max
+
+    def feromona_inicial(self) -> float:
+        """Feromona de las aristas nuevas: 1.0 (AS), tau0 (ACS) o tau_max (MMAS)"""
+        if self.variante == "acs" and self._tau0 is not None:
+            return self._tau0
+        if self.variante == "mmas" and self._limites is not None:
+            return self._limites[1]
+        return 1.0
+
+    def _llenar(self, valor: float):
+        self.feromonas[...] = valor
+        if self.vecinos is None:
+            np.fill_diagonal(self.feromonas, 0.0)
+
+    def _iniciar_acs(self):
+        """tau0 = Q / (n * L_vecino_más_cercano), con la ruta voraz de la propia colonia"""
+        _, longitudes = self.construir_colonia(1, voraz=True)
+        self._tau0 = self.q / (len(self.puntos) * max(float(longitudes[0]), 1e-9))
+        self._llenar(self._tau0)
+
+    def _mejor_solucion(self):
+        """(valor, trozos) de la mejor solución global, con los ids actuales"""
+        trozos = self.mejor_trozos if self.mejor_trozos is not None else [self.mejor_ids]
+        return self.mejor_distancia_global, trozos
+
+    def registrar_mejor(self, soluciones):
+        """Actualiza la mejor solución global con la mejor de la iteración"""
+        valor, trozos = min(soluciones, key=lambda sol: sol[0])
+        if valor < self.mejor_distancia_global:
+            self.mejor_distancia_global = valor
+            if self.flota:
+                self.mejor_trozos = [t.copy() for t in trozos]
+            self.mejor_ids = np.concatenate(trozos)
+            self._sin_mejora = 0
+        else:
+            self._sin_mejora += 1
+
+    def ramificacion(self, lam: float = LAMBDA_RAMIFICACION) -> float:
+        """Factor de ramificación lambda medio: aristas por punto con feromona por encima de
+           tau_min_i + lam * (tau_max_i - tau_min_i). Cerca de 2 la colonia ya convergió"""
+        tau = self.feromonas
+        if self.vecinos is None:
+            propia = np.eye(len(tau), dtype=bool)
+            bajo = np.where(propia, np.inf, tau).min(axis=1)
+            alto = np.where(propia, -np.inf, tau).max(axis=1)
+        else:
+            bajo, alto = tau.min(axis=1), tau.max(axis=1)
+        umbral = bajo + lam * (alto - bajo)
+        return float((tau >= umbral[:, None]).sum(axis=1).mean())
+
+    def convergio(self):
+        """Motivo de parada temprana (o None): estancamiento o factor de ramificación bajo.
+           La ramificación cae enseguida con MMAS/ACS, por eso se exige también algo de estancamiento"""
+        if not self.parada_temprana or self._sin_mejora < PACIENCIA_RAMIFICACION:
+            return None
+        if self._sin_mejora >= ESTANCAMIENTO:
+            return f"{self._sin_mejora} iteraciones sin mejora"
+        rama = self.ramificacion()
+        if rama <= RAMIFICACION_MIN:
+            return f"factor de ramificación {rama:.2f}"
+        return None
+
+    def depositar(self, ids: np.ndarray, deposito: float):
+        """Suma `deposito` en las aristas (i, i+1) de la ruta, en ambos sentidos"""
+        for a, b in ((ids[:-1], ids[1:]), (ids[1:], ids[:-1])):
+            np.add.at(self.feromonas, self._aristas(a, b), deposito)
+
+    def _mezclar(self, a: np.ndarray, b: np.ndarray, peso: float, valor: float):
+        """tau <- (1 - peso) * tau + peso * valor en las aristas a[i] - b[i] (ambos sentidos)"""
+        for x, y in ((a, b), (b, a)):
+            idx = self._aristas(x, y)
+            self.feromonas[idx] = (1.0 - peso) * self.feromonas[idx] + peso * valor
+
+    def _aristas(self, a: np.ndarray, b: np.ndarray):
+        """Índices en self.feromonas de las aristas a[i] -> b[i]; con candidatos solo se
+           guardan las aristas hacia vecinos y el resto se ignora"""
+        if self.vecinos is None:
+            return a, b
+        igual = self.vecinos[a] == b[:, None]
+        ok = igual.any(axis=1)
+        return a[ok], igual[ok].argmax(axis=1)
 
     def introducir_cambio(self):
         """Introduce cambios en el terreno (nuevos escombros)"""
-        if len(self.puntos) < N_PUNTOS * 1.5:  # Límite máximo de puntos
+        if len(self.puntos) < self.n_puntos * 1.5:  # Límite máximo de puntos
             # Agregar nuevo punto (simulando nuevo descubrimiento)
-            x = random.uniform(0, self.ancho)
-            y = random.uniform(0, self.alto)
-            nuevo_punto = Punto(len(self.puntos), x, y, 
-                               'superviviente' if random.random() > 0.5 else 'recurso')
+            x = self.rng.uniform(0, self.ancho)
+            y = self.rng.uniform(0, self.alto)
+            self.agregar_punto(x, y, 'superviviente' if self.rng.random() > 0.5 else 'recurso')
+
+    def agregar_punto(self, x: float, y: float, tipo: str) -> Punto:
+        """Agrega un punto en O(n): una fila/columna nueva (o sus candidatos) y
+           reparación de la mejor ruta por inserción más barata"""
+        nuevo_punto = Punto(len(self.puntos), x, y, tipo)
+        n = len(self.puntos) + 1
+        k = self._k_candidatos(n)
+        if (self.vecinos is None) != (k == 0) or (k and k != self.vecinos.shape[1]):
+            # Cambia el modo (denso <-> candidatos) o el k: reconstruir
             self.puntos.append(nuevo_punto)
-            
-            # Inicializar feromonas para el nuevo punto
-            for i in range(len(self.puntos)-1):
-                self.feromonas[(i, nuevo_punto.id)] = 1.0
-                self.feromonas[(nuevo_punto.id, i)] = 1.0
+            self._actualizar_candidatos() if k else self.construir_matrices()
+            self._reparar_insercion(nuevo_punto)
+            return nuevo_punto
+
+        self._reservar(n)
+        i = n - 1
+        self._buf['coords'][i] = (x, y)
+        self.puntos.append(nuevo_punto)
+        self._vistas()
+        d = self._distancias_desde(self.coords[i:i + 1], self.coords)[0]
+        if self.vecinos is None:
+            # Extender las matrices con la fila/columna del nuevo punto
+            eta = self._heuristica(d)
+            eta[i] = 0.0
+            self.distancias[i, :] = self.distancias[:, i] = d
+            self.heuristica[i, :] = self.heuristica[:, i] = eta
+            self.feromonas[i, :] = self.feromonas[:, i] = self.feromona_inicial()
+            self.feromonas[i, i] = 0.0
+        else:
+            # Candidatos del nuevo punto y de los puntos que ahora lo tienen más cerca
+            d[i] = np.inf
+            propios = np.argpartition(d, k - 1)[:k]
+            propios = propios[np.argsort(d[propios], kind='stable')]
+            self._fijar_fila(i, propios, d[propios])
+            for f in np.flatnonzero(d[:i] < self.distancias[:i, -1]):
+                s = int(np.searchsorted(self.distancias[f], d[f]))
+                self._fijar_fila(f, np.insert(self.vecinos[f], s, i)[:k],
+                                 np.insert(self.distancias[f], s, d[f])[:k],
+                                 np.insert(self.feromonas[f], s, self.feromona_inicial())[:k])
+        self._reparar_insercion(nuevo_punto)
+        return nuevo_punto
+
+    def retirar_punto(self, punto: Punto):
+        """Quita un punto ya rescatado en O(n) (O(n*k) con candidatos): el último punto
+           ocupa su id y la mejor ruta se repara empalmando a sus vecinos de ruta"""
+        n = len(self.puntos)
+        i, ultimo = punto.id, n - 1
+        self._reparar_retiro(punto)
+        k = self._k_candidatos(n - 1)
+        if (self.vecinos is None) != (k == 0) or (k and k != self.vecinos.shape[1]):
+            # Cambia el modo o el k: reconstruir sin el punto
+            self._mover_id(punto, ultimo)
+            self._actualizar_candidatos() if k else self.construir_matrices()
+            return
+        if self.vecinos is None:
+            for nombre in ('distancias', 'heuristica', 'feromonas'):
+                m = self._buf[nombre]
+                m[i, :n] = m[ultimo, :n]
+                m[:n, i] = m[:n, ultimo]
+                m[i, i] = 0.0
+        else:
+            # Quien tenía al punto como candidato lo reemplaza por su siguiente vecino
+            k = self.vecinos.shape[1]
+            for f in np.flatnonzero((self.vecinos == i).any(axis=1)):
+                if f == i:
+                    continue
+                fila = self.vecinos[f]
+                quedan = fila != i
+                d = self.tramos(np.full(n, f), np.arange(n))
+                d[fila] = d[[f, i]] = np.inf
+                extra = int(np.argmin(d))
+                vec = np.append(fila[quedan], extra)
+                dist = np.append(self.distancias[f][quedan], d[extra])
+                fero = np.append(self.feromonas[f][quedan], self.feromona_inicial())
+                orden = np.argsort(dist, kind='stable')
+                self._fijar_fila(f, vec[orden][:k], dist[orden][:k], fero[orden][:k])
+            for nombre in ('distancias', 'heuristica', 'feromonas', 'vecinos'):
+                self._buf[nombre][i] = self._buf[nombre][ultimo]
+            self.vecinos[self.vecinos == ultimo] = i
+        self._buf['coords'][i] = self._buf['coords'][ultimo]
+        self._mover_id(punto, ultimo)
+        self._vistas()
+
+    def _mover_id(self, punto: Punto, ultimo: int):
+        """El último punto pasa a ocupar el id del retirado (también en la mejor ruta)"""
+        i = punto.id
+        movido = self.puntos.pop()
+        if movido is not punto:
+            movido.id = i
+            self.puntos[i] = movido
+            for ids in [self.mejor_ids] + (self.mejor_trozos or []):
+                if ids is not None:
+                    ids[ids == ultimo] = i
+
+    def _fijar_fila(self, f: int, vecinos, distancias, feromonas=None):
+        self.vecinos[f] = vecinos
+        self.distancias[f] = distancias
+        self.heuristica[f] = self._heuristica(distancias)
+        self.feromonas[f] = self.feromona_inicial() if feromonas is None else feromonas
+
+    def _reparar_insercion(self, punto: Punto):
+        """Inserta el punto en la mejor ruta donde menos la alarga (extremos incluidos)"""
+        if self.mejor_ids is None or not len(self.mejor_ids):
+            return
+        ids = self.mejor_ids
+        nuevo = np.full(len(ids), punto.id)
+        d = self.tramos(nuevo, ids)
+        # costo de cada hueco: antes del primero, entre (k, k+1), después del último
+        costos = np.concatenate([[d[0]], d[:-1] + d[1:] - self.tramos(ids[:-1], ids[1:]), [d[-1]]])
+        hueco = int(np.argmin(costos))
+        self.mejor_ids = np.insert(ids, hueco, punto.id)
+        self.mejor_distancia_global += float(costos[hueco])
+        if self.flota:
+            self.adoptar_mejor(self.mejor_ids)
+            return
+        self._mejorar_mejor_ruta()
+
+    def _reparar_retiro(self, punto: Punto):
+        """Saca el punto de la mejor ruta uniendo a su anterior y su siguiente"""
+        if self.mejor_ids is None:
+            return
+        donde = np.flatnonzero(self.mejor_ids == punto.id)
+        if not len(donde):
+            return
+        k, ruta = int(donde[0]), self.mejor_ids
+        ahorro = 0.0
+        if k > 0:
+            ahorro += self.longitud_ruta(ruta[k - 1:k + 1])
+        if k + 1 < len(ruta):
+            ahorro += self.longitud_ruta(ruta[k:k + 2])
+        if 0 < k < len(ruta) - 1:
+            ahorro -= self.longitud_ruta(ruta[[k - 1, k + 1]])
+        self.mejor_ids = np.delete(ruta, k)
+        self.mejor_distancia_global -= ahorro
+        if self.flota and len(self.mejor_ids):
+            self.adoptar_mejor(self.mejor_ids)
+
+    def adoptar_mejor(self, ids: np.ndarray):
+        """Toma `ids` como mejor ruta global (en modo flota la reparte entre los drones).
+           Devuelve (trozos, valor): valor = longitud o makespan"""
+        if self.flota:
+            trozos, valor = self.repartir(ids)
+            self.mejor_trozos = [t.copy() for t in trozos]
+        else:
+            trozos, valor = [ids], self.longitud_ruta(ids)
+        self.mejor_ids = np.array(ids, dtype=np.intp)
+        self.mejor_distancia_global = valor
+        return trozos, valor
 
-    def calcular_metricas(self, iteracion: int):
-        """Calcula métricas de desempeño"""
+    def _mejorar_mejor_ruta(self):
+        """Con búsqueda local activa, deja la ruta reparada ya mejorada"""
+        if not self.busqueda_local or len(self.mejor_ids) < 4:
+            return
+        rutas, longitudes = self.mejor_ids[None, :].copy(), np.array([self.mejor_distancia_global])
+        self.mejorar_rutas(rutas, longitudes)
+        self.mejor_ids = rutas[0]
+        self.mejor_distancia_global = float(longitudes[0])
+
+    def _actualizar_candidatos(self):
+        """Recalcula todas las listas de candidatos, conservando la feromona de las
+           aristas que siguen siendo candidatas"""
+        n = len(self.puntos)
+        self.coords = np.array([(p.x, p.y) for p in self.puntos], dtype=float).reshape(n, 2)
+        previos, feromonas_previas = self.vecinos, self.feromonas
+        vecinos, distancias = vecinos_cercanos(self.coords, self._k_candidatos(n))
+        feromonas = np.full_like(distancias, self.feromona_inicial())
+        if previos is not None:
+            m = min(len(previos), n)
+            # feromona previa de (i, vecinos[i][s]) si esa arista ya era candidata
+            igual = vecinos[:m, :, None] == previos[:m, None, :]
+            existe = igual.any(axis=2)
+            viejas = np.take_along_axis(feromonas_previas[:m], igual.argmax(axis=2), axis=1)
+            feromonas[:m][existe] = viejas[existe]
+        self._adoptar(self.coords, distancias, self._heuristica(distancias),
+                      feromonas, vecinos)
+
+    def calcular_metricas(self, iteracion: int, t_construccion: float = 0.0, t_feromonas: float = 0.0):
+        """Calcula métricas de desempeño y las agrega al historial (con los tiempos por fase)"""
+        t0 = time.perf_counter()
         total_puntos = len(self.puntos)
-        puntos_cubiertos = set()
-        tiempo_maximo = 0
+        cubiertos = np.zeros(total_puntos, dtype=bool)
+        tiempo_maximo = 0.0
         
         for drone in self.drones:
-            puntos_cubiertos.update(drone.puntos_visitados)
-            if drone.distancia_recorrida > tiempo_maximo:
-                tiempo_maximo = drone.distancia_recorrida
+            cubiertos[drone.indices] = True
+            tiempo_maximo = max(tiempo_maximo, drone.distancia_recorrida)
                 
-        cobertura = len(puntos_cubiertos) / total_puntos * 100
+        cobertura = cubiertos.sum() / total_puntos * 100
         
-        # Encontrar mejor ruta global
-        for drone in self.drones:
-            if drone.distancia_recorrida < self.mejor_distancia_global:
-                self.mejor_distancia_global = drone.distancia_recorrida
-                self.mejor_ruta_global = drone.ruta.copy()
-                
         metricas = {
             'iteracion': iteracion,
-            'cobertura': cobertura,
+            'cobertura': float(cobertura),
             'tiempo_total': tiempo_maximo,
             'mejor_distancia': self.mejor_distancia_global,
-            'total_puntos': total_puntos
+            'total_puntos': total_puntos,
+            'hormigas': self.hormigas(),
+            't_construccion': t_construccion,
+            't_feromonas': t_feromonas,
         }
-        
-        self.historial_metricas.append(metricas)
+        metricas['t_metricas'] = time.perf_counter() - t0
+        self.historial_metricas.agregar(**metricas)
+        return metricas
+
+    def iterar(self, iteracion: int):
+        """Una iteración: construir rutas, actualizar feromonas y calcular métricas"""
+        t0 = time.perf_counter()
+        if self.variante == "acs" and self._tau0 is None:
+            self._iniciar_acs()
+        if self.flota:
+            soluciones = self._construir_flota()
+        else:
+            # Explorar rutas (toda la colonia a la vez)
+            rutas, longitudes = self.construir_colonia(self.hormigas())
+            if self.busqueda_local:
+                self.mejorar_rutas(rutas, longitudes)
+            self.asignar_rutas(rutas, longitudes)
+            soluciones = [(float(l), [r]) for r, l in zip(rutas, longitudes)]
+        t1 = time.perf_counter()
+
+        # Actualizar feromonas
+        self.registrar_mejor(soluciones)
+        self.actualizar_feromonas(soluciones)
+        t2 = time.perf_counter()
+
+        # Calcular métricas
+        metricas = self.calcular_metricas(iteracion, t1 - t0, t2 - t1)
+        if self.monitor is not None:
+            self.monitor(metricas)
         return metricas
 
+    def repartir(self, ids: np.ndarray):
+        """Reparte una ruta entre los drones -> (lista de rutas (arreglos de ids), makespan)"""
+        inicios, makespan = dividir_ruta(self.tramos(ids[:-1], ids[1:]), len(self.drones))
+        return np.split(ids, inicios[1:]), makespan
+
+    def _construir_flota(self):
+        """Modo flota: cada una de las hormigas() construye una ruta gigante que
+           dividir_ruta corta en un trozo por drone minimizando el makespan; se deposita
+           Q / makespan en los trozos. Devuelve las soluciones (makespan, trozos)"""
+        rutas, _ = self.construir_colonia(self.hormigas())
+        soluciones = [self.repartir(ids)[::-1] for ids in rutas]    # (makespan, trozos)
+        if self.busqueda_local:
+            elegidas = (range(len(soluciones)) if self.busqueda_local == "todas"
+                        else [min(range(len(soluciones)), key=lambda h: soluciones[h][0])])
+            for h in elegidas:
+                # 2-opt / Or-opt dentro de cada trozo y nuevo reparto
+                trozos = [busqueda_local(t, self.coords, self._vecinos_busqueda())[0] if len(t) > 3 else t
+                          for t in soluciones[h][1]]
+                soluciones[h] = self.repartir(np.concatenate(trozos))[::-1]
+
+        makespan, trozos = min(soluciones, key=lambda sol: sol[0])
+        # Cada drone vuela su trozo de la mejor solución de la iteración
+        for k, drone in enumerate(self.drones):
+            t = trozos[k] if k < len(trozos) else np.zeros(0, dtype=np.intp)
+            self._cargar_ruta(drone, t, self.longitud_ruta(t) if len(t) > 1 else 0.0)
+        return soluciones
+
+    def exportar_metricas(self, ruta: str):
+        """Exporta el historial a .csv o .npz (el .npz incluye la mejor ruta como ids)"""
+        extra = {}
+        if self.mejor_ids is not None:
+            extra['mejor_ruta'] = self.mejor_ids
+        self.historial_metricas.exportar(ruta, **extra)
+
     def ejecutar_aco(self):
         """Ejecuta el algoritmo ACO completo"""
         self.generar_terreno()
         
-        for iteracion in range(N_ITERACIONES):
-            # Explorar rutas
-            for drone in self.drones:
-                self.explorar_ruta(drone)
-                
-            # Actualizar feromonas
-            self.actualizar_feromonas()
-            
-            # Calcular métricas
-            metricas = self.calcular_metricas(iteracion)
+        for iteracion in range(self.n_iteraciones):
+            metricas = self.iterar(iteracion)
             
             # Introducir cambio cada 20 iteraciones
             if iteracion % 20 == 0 and iteracion > 0:
@@ -178,6 +1007,77 @@ class ACORescate:
                   f"Tiempo: {metricas['tiempo_total']:.2f}, "
                   f"Mejor: {metricas['mejor_distancia']:.2f}")
 
+            motivo = self.convergio()
+            if motivo:
+                print(f"Iteración {iteracion}: Parada temprana ({motivo})")
+                break
+
+    def opciones(self) -> dict:
+        """Argumentos del constructor (salvo terreno y semilla) para replicar esta instancia"""
+        return dict(n_drones=len(self.drones), candidatos=self.candidatos,
+                    busqueda_local=self.busqueda_local, flota=self.flota,
+                    variante=self.variante, parada_temprana=self.parada_temprana,
+                    alpha=self.alpha, beta=self.beta, evaporacion=self.evaporacion, q=self.q,
+                    n_iteraciones=self.n_iteraciones, n_puntos=self.n_puntos,
+                    n_hormigas=self.n_hormigas)
+
+    def ejecutar_islas(self, n_islas: int = None, procesos: int = None,
+                       n_iteraciones: int = None, migracion_cada: int = MIGRACION_CADA,
+                       mezcla: float = MEZCLA_FEROMONAS, semilla=None):
+        """Modelo de islas: n_islas colonias independientes (cada una con su matriz de
+           feromonas) en un pool de procesos. Cada `migracion_cada` iteraciones una isla
+           publica su mejor ruta en memoria compartida y adopta la mejor de las demás
+           (y, con mezcla > 0, mezcla sus feromonas con la media de las otras islas).
+           El terreno es el actual (se genera si no hay). Devuelve el resumen por isla."""
+        from multiprocessing import Pool, Lock, cpu_count
+        from multiprocessing.shared_memory import SharedMemory
+
+        if not self.puntos:
+            self.generar_terreno()
+        n_islas = n_islas or cpu_count()
+        n_iteraciones = n_iteraciones or self.n_iteraciones
+        n = len(self.puntos)
+        semillas = np.random.SeedSequence(semilla).spawn(n_islas)
+
+        # Memoria compartida: mejor ruta y longitud por isla (+ feromonas si se mezclan)
+        bloques = {
+            'rutas': ((n_islas, n), np.intp),
+            'longitudes': ((n_islas,), np.float64),
+            'feromonas': ((n_islas,) + self.feromonas.shape if mezcla > 0 else (1,), np.float64),
+        }
+        memorias = {}
+        try:
+            for nombre, (forma, dtype) in bloques.items():
+                shm = SharedMemory(create=True, size=int(np.prod(forma)) * np.dtype(dtype).itemsize)
+                memorias[nombre] = shm
+                arreglo = np.ndarray(forma, dtype=dtype, buffer=shm.buf)
+                arreglo[...] = np.inf if nombre == 'longitudes' else 0
+            espec = {k: (memorias[k].name, forma, dtype) for k, (forma, dtype) in bloques.items()}
+            config = dict(ancho=self.ancho, alto=self.alto, opciones=self.opciones(),
+                          coords=self.coords, tipos=[p.tipo for p in self.puntos],
+                          n_iteraciones=n_iteraciones, migracion_cada=migracion_cada, mezcla=mezcla)
+            tareas = [(k, semillas[k]) for k in range(n_islas)]
+            with Pool(processes=min(procesos or cpu_count(), n_islas), initializer=_isla_init,
+                      initargs=(Lock(), espec, config)) as pool:
+                resultados = pool.map(_isla_ejecutar, tareas, chunksize=1)
+        finally:
+            for shm in memorias.values():
+                shm.close()
+                shm.unlink()
+
+        # Mejor ruta global entre todas las islas
+        mejor = min(resultados, key=lambda r: r['mejor_distancia'])
+        self.mejor_distancia_global = mejor['mejor_distancia']
+        self.mejor_ids = mejor['mejor_ruta']
+        if self.flota:
+            self.adoptar_mejor(self.mejor_ids)
+        self.historial_metricas = mejor['historial']
+        curva = self.historial_metricas.columna('mejor_distancia')
+        for r in resultados:
+            otra = r['historial'].columna('mejor_distancia')[:len(curva)]
+            np.minimum(curva[:len(otra)], otra, out=curva[:len(otra)])
+        return [{k: v for k, v in r.items() if k != 'historial'} for r in resultados]
+
     def visualizar_resultados(self):
         """Visualiza los resultados del algoritmo"""
         fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
@@ -191,8 +1091,12 @@ class ACORescate:
                        marker='o' if punto.tipo == 'superviviente' else 's',
                        s=100, label=punto.tipo)
             
-        # Mostrar mejor ruta global
-        if self.mejor_ruta_global:
+        # Mostrar mejor ruta global (en modo flota, una por drone)
+        if self.mejor_flota:
+            for k, ruta in enumerate(self.mejor_flota):
+                ax1.plot([p.x for p in ruta], [p.y for p in ruta], '-', linewidth=2, alpha=0.8,
+                         color=plt.cm.tab10(k % 10), label=f'Drone {k}')
+        elif self.mejor_ruta_global:
             x_ruta = [p.x for p in self.mejor_ruta_global]
             y_ruta = [p.y for p in self.mejor_ruta_global]
             ax1.plot(x_ruta, y_ruta, 'g-', linewidth=2, alpha=0.7, label='Mejor ruta')
@@ -206,9 +1110,9 @@ class ACORescate:
         ax1.grid(True, alpha=0.3)
         
         # Visualizar métricas
-        iteraciones = [m['iteracion'] for m in self.historial_metricas]
-        cobertura = [m['cobertura'] for m in self.historial_metricas]
-        tiempos = [m['tiempo_total'] for m in self.historial_metricas]
+        iteraciones = self.historial_metricas.columna('iteracion')
+        cobertura = self.historial_metricas.columna('cobertura')
+        tiempos = self.historial_metricas.columna('tiempo_total')
         
         ax2.plot(iteraciones, cobertura, 'b-', label='Cobertura (%)')
         ax2.set_xlabel('Iteración')
@@ -228,10 +1132,152 @@ class ACORescate:
         plt.tight_layout()
         plt.show()
 
+# Estado de cada proceso del modelo de islas (lo fija _isla_init)
+_ISLA = {}
+
+def _isla_init(lock, espec, config):
+    from multiprocessing.shared_memory import SharedMemory
+    _ISLA.update(lock=lock, config=config, memorias=[])
+    for nombre, (shm_nombre, forma, dtype) in espec.items():
+        shm = SharedMemory(name=shm_nombre)
+        _ISLA['memorias'].append(shm)     # mantener viva la referencia
+        _ISLA[nombre] = np.ndarray(forma, dtype=dtype, buffer=shm.buf)
+
+def _isla_ejecutar(tarea):
+    """Corre una colonia completa (sin cambios de terreno) y migra por memoria compartida"""
+    k, semilla = tarea
+    cfg = _ISLA['config']
+    aco = ACORescate(cfg['ancho'], cfg['alto'], semilla=semilla, **cfg['opciones'])
+    aco.cargar_terreno(cfg['coords'], cfg['tipos'])
+    rutas, longitudes, feromonas = _ISLA['rutas'], _ISLA['longitudes'], _ISLA['feromonas']
+    migraciones = 0
+
+    for iteracion in range(cfg['n_iteraciones']):
+        aco.iterar(iteracion)
+        if aco.convergio():
+            break
+        if (iteracion + 1) % cfg['migracion_cada'] != 0:
+            continue
+        propia = aco.mejor_ids
+        otras = None
+        with _ISLA['lock']:
+            rutas[k] = propia
+            longitudes[k] = aco.mejor_distancia_global
+            j = int(np.argmin(longitudes))
+            entrante = rutas[j].copy() if longitudes[j] < aco.mejor_distancia_global else None
+            if cfg['mezcla'] > 0:
+                feromonas[k] = aco.feromonas
+                escritas = np.isfinite(longitudes)
+                escritas[k] = False
+                if escritas.any():
+                    otras = feromonas[escritas].mean(axis=0)
+        if entrante is not None:
+            # Migración: adoptar la mejor ruta de otra isla y reforzarla
+            trozos, valor = aco.adoptar_mejor(entrante)
+            for t in trozos:
+                if len(t) > 1:
+                    aco.depositar(t, aco.q / valor)
+            migraciones += 1
+        if otras is not None:
+            aco.feromonas *= 1.0 - cfg['mezcla']
+            aco.feromonas += cfg['mezcla'] * otras
+
+    return {
+        'isla': k,
+        'mejor_distancia': aco.mejor_distancia_global,
+        'mejor_ruta': aco.mejor_ids,
+        'migraciones': migraciones,
+        'historial': aco.historial_metricas,
+    }
+
+def comparar_busqueda_local(n_puntos: int = 200, n_iteraciones: int = 50, semilla: int = 0,
+                            modos=(None, "mejor", "todas")):
+    """Tiempo hasta la calidad: corre el mismo terreno con cada modo de búsqueda local y
+       mide iteraciones y segundos hasta alcanzar la mejor distancia final del modo sin
+       búsqueda local (el primero de `modos`)."""
+    rng = np.random.default_rng(semilla)
+    coords = rng.uniform(0, 100, (n_puntos, 2))
+    tipos = ['superviviente'] * n_puntos
+    curvas = {}
+    for modo in modos:
+        aco = ACORescate(100, 100, semilla=semilla, busqueda_local=modo)
+        aco.cargar_terreno(coords, tipos)
+        curva = []
+        t0 = time.perf_counter()
+        for iteracion in range(n_iteraciones):
+            aco.iterar(iteracion)
+            curva.append((time.perf_counter() - t0, aco.mejor_distancia_global))
+        curvas[modo] = curva
+
+    objetivo = curvas[modos[0]][-1][1]
+    resultados = []
+    for modo, curva in curvas.items():
+        llegada = next((k for k, (_, d) in enumerate(curva) if d <= objetivo), None)
+        resultados.append({
+            'modo': modo or 'ninguna',
+            'mejor_distancia': curva[-1][1],
+            'iteraciones_objetivo': None if llegada is None else llegada + 1,
+            'segundos_objetivo': None if llegada is None else curva[llegada][0],
+            'segundos_total': curva[-1][0],
+        })
+    print(f"Objetivo: {objetivo:.2f} ({n_puntos} puntos, {n_iteraciones} iteraciones)")
+    for r in resultados:
+        its = r['iteraciones_objetivo'] if r['iteraciones_objetivo'] is not None else '-'
+        seg = f"{r['segundos_objetivo']:.3f}s" if r['segundos_objetivo'] is not None else '-'
+        print(f"  {r['modo']:>8}: mejor {r['mejor_distancia']:9.2f} | objetivo en {its} it / {seg} "
+              f"| total {r['segundos_total']:.3f}s")
+    return resultados
+
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Rescate con drones (ACO)")
+    parser.add_argument("--islas", type=int, default=0,
+                        help="colonias en paralelo (modelo de islas); 0 = una sola colonia")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos del pool (por defecto, núcleos)")
+    parser.add_argument("--mezcla", type=float, default=MEZCLA_FEROMONAS,
+                        help="fracción de mezcla de feromonas entre islas en cada migración")
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument("--drones", type=int, default=N_DRONES, help="tamaño de la flota / colonia")
+    parser.add_argument("--hormigas", type=int, default=None,
+                        help=f"hormigas por iteración (por defecto una por drone; {N_HORMIGAS} con --flota)")
+    parser.add_argument("--puntos", type=int, default=N_PUNTOS, help="puntos del terreno generado")
+    parser.add_argument("--iteraciones", type=int, default=N_ITERACIONES)
+    parser.add_argument("--alpha", type=float, default=ALPHA, help="peso de la feromona")
+    parser.add_argument("--beta", type=float, default=BETA, help="peso de la heurística 1/d")
+    parser.add_argument("--evaporacion", type=float, default=EVAPORACION)
+    parser.add_argument("--q", type=float, default=Q, help="feromona depositada por unidad de 1/longitud")
+    parser.add_argument("--variante", choices=["as", "mmas", "acs"], default=VARIANTE,
+                        help="as: Ant System; mmas: MAX-MIN (límites, solo la mejor deposita); acs: Ant Colony System")
+    parser.add_argument("--parada", action="store_true",
+                        help="parar al estancarse la mejor ruta o caer el factor de ramificación")
+    parser.add_argument("--flota", action="store_true",
+                        help="repartir los puntos entre los drones (mTSP) minimizando el makespan")
+    parser.add_argument("--busqueda-local", choices=["mejor", "todas"], default=BUSQUEDA_LOCAL,
+                        help="2-opt + Or-opt sobre la mejor ruta de cada iteración o sobre todas")
+    parser.add_argument("--metricas", default=None, metavar="RUTA",
+                        help="exportar métricas y tiempos por fase a .csv o .npz")
+    parser.add_argument("--comparar-bl", type=int, default=0, metavar="N_PUNTOS",
+                        help="solo comparar tiempo hasta la calidad con y sin búsqueda local")
+    return parser.parse_args(argv)
+
 # Ejecutar la simulación
 if __name__ == "__main__":
-    aco = ACORescate(ancho=100, alto=100)
-    aco.ejecutar_aco()
+    args = parse_args()
+    if args.comparar_bl:
+        comparar_busqueda_local(args.comparar_bl, semilla=args.semilla or 0)
+        raise SystemExit(0)
+    aco = ACORescate(ancho=100, alto=100, n_drones=args.drones, semilla=args.semilla,
+                     busqueda_local=args.busqueda_local, flota=args.flota,
+                     variante=args.variante, parada_temprana=args.parada,
+                     alpha=args.alpha, beta=args.beta, evaporacion=args.evaporacion, q=args.q,
+                     n_iteraciones=args.iteraciones, n_puntos=args.puntos, n_hormigas=args.hormigas)
+    if args.islas > 0:
+        aco.generar_terreno()
+        aco.ejecutar_islas(args.islas, args.procesos, mezcla=args.mezcla, semilla=args.semilla)
+    else:
+        aco.ejecutar_aco()
+    if args.metricas:
+        aco.exportar_metricas(args.metricas)
     aco.visualizar_resultados()
     
     # Mostrar resumen final
@@ -0,0 +1,48 @@
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import pytest
+
+import hormigas
+
+def terreno_fijo(aco, n=30, semilla=0):
+    coords = np.random.default_rng(semilla).uniform(0, 100, (n, 2))
+    aco.cargar_terreno(coords, ['superviviente'] * n)
+
+@pytest.mark.parametrize("variante", ["as", "mmas", "acs"])
+def test_parada_temprana_en_terreno_fijo(variante):
+    aco = hormigas.ACORescate(100, 100, semilla=1, variante=variante, parada_temprana=True)
+    terreno_fijo(aco)
+    for iteracion in range(hormigas.N_ITERACIONES):
+        aco.iterar(iteracion)
+        if aco.convergio():
+            break
+    assert iteracion < hormigas.N_ITERACIONES - 1
+
+def test_cambios_de_terreno_no_reinician_el_estancamiento():
+    aco = hormigas.ACORescate(100, 100, semilla=2, parada_temprana=True)
+    terreno_fijo(aco)
+    for iteracion in range(40):
+        aco.iterar(iteracion)
+    antes = aco._sin_mejora
+    aco.agregar_punto(50.0, 50.0, 'recurso')
+    aco.retirar_punto(aco.puntos[3])
+    assert aco._sin_mejora == antes
+
+def test_ejecutar_aco_se_detiene_antes(capsys):
+    aco = hormigas.ACORescate(100, 100, semilla=0, parada_temprana=True, n_iteraciones=200)
+    aco.ejecutar_aco()
+    assert len(aco.historial_metricas) < 200
+    assert "Parada temprana" in capsys.readouterr().out
+
+def test_barrido_no_reanuda_otro_checkpoint(tmp_path):
+    import barrido
+    ruta = str(tmp_path / "barrido.jsonl")
+    configs = [{"alpha": 1.0}]
+    a = barrido.benchmark.instancia_sintetica(20, 0)
+    filas = barrido.barrer(a, configs, [0], iteraciones=2, procesos=1, checkpoint=ruta)
+    assert barrido.barrer(a, configs, [0], iteraciones=2, procesos=1, checkpoint=ruta) == filas
+    for otra, iteraciones in ((barrido.benchmark.instancia_sintetica(30, 0), 2),
+                              (barrido.benchmark.instancia_sintetica(20, 1), 2), (a, 3)):
+        with pytest.raises(ValueError):
+            barrido.barrer(otra, configs, [0], iteraciones=iteraciones, procesos=1, checkpoint=ruta)
@@ -1,9 +1,21 @@
-import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-import random
+"""
+Simulación de polinización con un enjambre de abejas (drones)
+- Enjambre: núcleo sin gráficos con reloj de ticks explícito; run(n_ticks) y
+  run_until_complete() corren tan rápido como da la CPU
+- mostrar(): visor matplotlib opcional que muestrea el estado a su propio ritmo
+
+Uso:
+    python Abejas.py
+    python Abejas.py --drones 2000 --flores 50000 --ticks-por-cuadro 5
+    python Abejas.py --sin-visor --drones 2000 --flores 50000 --semilla 0
+"""
+
+import argparse
+import sys
 import time
 
+import numpy as np
+
 # -------------------- PARÁMETROS --------------------
 NUM_DRONES = 40
 NUM_FLORES = 80
@@ -11,146 +23,573 @@ RANGO = 100
 BASE = np.array([RANGO / 2, RANGO / 2])
 VELOCIDAD = 1.5
 BATERIA_MAX = 80  # batería corta
+BATERIA_MINIMA = 10  # por debajo, regresa al panal
 RECARGA_TIEMPO = 30
 RADIO_POLINIZACION = 2.0
+DT = 0.1                  # segundos simulados por tick
+SEMILLA = None
+
+# Visor: cuadros cada INTERVALO_MS, con TICKS_POR_CUADRO ticks de simulación entre cuadros
 INTERVALO_MS = 100
+TICKS_POR_CUADRO = 1
+PAUSA_FINAL = 3.0         # segundos que se muestra el campo completo antes de reiniciar
+
+# Elección de objetivos: "cercana" = flor libre más cercana (índice espacial con reservas),
+# "azar" = cualquier flor al azar (comportamiento original). "cercana" necesita muchos menos
+# ticks pero cada pedido al índice cuesta; OBJETIVOS_POR_TICK acota los pedidos por tick
+# (~100 ms con 100 000 drones) y el resto espera su turno quieto
+OBJETIVOS = "cercana"
+FLORES_POR_CELDA = 2      # densidad objetivo de la grilla del índice
+OBJETIVOS_POR_TICK = 4096  # máximo de drones que piden flor al índice por tick (None: sin límite)
+AGRUPAR_MARGEN = 1        # niveles por debajo del vecindario vacío a los que se agrupan las consultas
+PROPUESTAS = 4            # candidatas por drone en cada consulta al índice
+SIN_OBJETIVO = -1
+
+# Estados y roles como códigos enteros (índices en estas tuplas)
+ESTADOS = ("buscando", "regresando", "recargando", "esperando")
+BUSCANDO, REGRESANDO, RECARGANDO, ESPERANDO = range(len(ESTADOS))
+TIPOS = ("obrera", "observadora", "exploradora")
+
+# -------------------- ÍNDICE ESPACIAL --------------------
+# Vecindario 3x3 de un bloque (incluido él mismo)
+_DX, _DY = (d.ravel() for d in np.meshgrid(np.arange(-1, 2), np.arange(-1, 2)))
+# Los 4 hijos de un bloque en el nivel de abajo
+_HIJOS_X, _HIJOS_Y = np.array([0, 1, 0, 1]), np.array([0, 0, 1, 1])
+
+class IndiceFlores:
+    """Grilla uniforme sobre las flores libres (ni polinizadas ni reservadas).
+       Las flores se guardan ordenadas por celda; dentro de cada celda las libres ocupan
+       un prefijo de largo libres[c], así que quitar o devolver una flor es un swap O(1).
+       Encima de la grilla hay una pirámide de conteos (bloques de 2x2, 4x4, ...) para que
+       las búsquedas salten las zonas ya vaciadas. Cuando quedan pocas libres la grilla
+       se reconstruye más gruesa."""
+
+    def __init__(self, flores, rango=RANGO, por_celda=FLORES_POR_CELDA):
+        self.flores = flores
+        self.rango = rango
+        self.por_celda = por_celda
+        self.libre = np.ones(len(flores), dtype=bool)
+        self.polinizada = np.zeros(len(flores), dtype=bool)
+        self._construir()
+
+    def _construir(self):
+        """Reparte las flores no polinizadas en celdas (~por_celda libres por celda)"""
+        vivas = np.flatnonzero(~self.polinizada)
+        n_libres = int(np.count_nonzero(self.libre))
+        self.lado = max(1, min(2048, int(np.sqrt(max(n_libres, 1) / self.por_celda))))
+        self.h = self.rango / self.lado
+        celda = self._celda(self.flores[vivas])
+        # Libres primero dentro de cada celda
+        orden = np.lexsort((~self.libre[vivas], celda))
+        self.orden = vivas[orden]
+        self.celda_de = np.full(len(self.flores), -1)
+        self.celda_de[vivas] = celda
+        self.donde = np.full(len(self.flores), -1)
+        self.donde[self.orden] = np.arange(len(self.orden))
+        n_celdas = self.lado * self.lado
+        self.inicio = np.searchsorted(celda[orden], np.arange(n_celdas))
+        self.libres = np.bincount(celda[self.libre[vivas]], minlength=n_celdas)
+        self.n_libres = n_libres
+        self._construidas = n_libres
+        # niveles[0] es una vista de libres como (fila j, columna i); niveles[L] suma bloques de 2^L
+        self.niveles = [self.libres.reshape(self.lado, self.lado)]
+        while self.niveles[-1].shape[0] > 1:
+            abajo = self.niveles[-1]
+            m = (abajo.shape[0] + 1) // 2
+            par = np.zeros((2 * m, 2 * m), dtype=abajo.dtype)
+            par[:abajo.shape[0], :abajo.shape[1]] = abajo
+            self.niveles.append(par.reshape(m, 2, m, 2).sum(axis=(1, 3)))
+
+    def _ij(self, p):
+        return np.clip((p / self.h).astype(np.intp), 0, self.lado - 1)
+
+    def _celda(self, p):
+        ij = self._ij(p)
+        return ij[:, 1] * self.lado + ij[:, 0]
+
+    def _mover(self, ids, quitar):
+        """Saca (quitar=True) o devuelve flores al prefijo libre de su celda. Por capas:
+           en cada capa, a lo sumo una flor por celda, así el swap es vectorizado"""
+        ids = ids[(self.libre[ids] == quitar) & (self.celda_de[ids] >= 0)]
+        ids = np.unique(ids)
+        movidas = self.celda_de[ids]
+        while ids.size:
+            celdas = self.celda_de[ids]
+            _, primera = np.unique(celdas, return_index=True)
+            capa = ids[primera]
+            c = celdas[primera]
+            borde = self.inicio[c] + self.libres[c] - (1 if quitar else 0)
+            otra = self.orden[borde]
+            p = self.donde[capa]
+            self.orden[p], self.orden[borde] = otra, capa
+            self.donde[otra], self.donde[capa] = p, borde
+            self.libres[c] += -1 if quitar else 1
+            resto = np.ones(len(ids), dtype=bool)
+            resto[primera] = False
+            ids = ids[resto]
+            self.libre[capa] = not quitar
+            self.n_libres += -len(capa) if quitar else len(capa)
+        # Conteos de la pirámide (el nivel 0 ya se actualizó: es la vista de libres)
+        ci, cj = movidas % self.lado, movidas // self.lado
+        for nivel, conteo in enumerate(self.niveles[1:], 1):
+            np.add.at(conteo, (cj >> nivel, ci >> nivel), -1 if quitar else 1)
+
+    def quitar(self, ids):
+        self._mover(np.asarray(ids), True)
+
+    def devolver(self, ids):
+        """Devuelve al índice flores reservadas que no llegaron a polinizarse"""
+        ids = np.asarray(ids)
+        self._mover(ids[~self.polinizada[ids]], False)
+
+    def polinizar(self, ids):
+        self.quitar(ids)
+        self.polinizada[ids] = True
+        self._reconstruir_si_hace_falta()
+
+    def _reconstruir_si_hace_falta(self):
+        # Con menos de 1/4 de las libres de la última construcción, grilla más gruesa
+        if self.n_libres < self._construidas // 4:
+            self._construir()
+
+    def reservar_cercanas(self, pos):
+        """Para cada posición, la flor libre más cercana, que queda reservada (fuera del
+           índice). SIN_OBJETIVO si no hay. Cada posición recibe sus PROPUESTAS candidatas
+           más cercanas y propone la primera que siga libre; si varias eligen la misma flor
+           se la queda la más cercana y las otras pasan a su siguiente candidata. Solo las
+           que agotan sus candidatas vuelven a consultar el índice"""
+        elegidas = np.full(len(pos), SIN_OBJETIVO)
+        pendientes = np.arange(len(pos))
+        while pendientes.size and self.n_libres:
+            filas, flores, dist, turno = self._k_cercanas(pos[pendientes], PROPUESTAS)
+            filas = pendientes[filas]
+            while filas.size:
+                vigente = self.libre[flores] & (elegidas[filas] == SIN_OBJETIVO)
+                filas, flores, dist, turno = filas[vigente], flores[vigente], dist[vigente], turno[vigente]
+                # La primera candidata libre de cada posición...
+                o = np.lexsort((turno, filas))
+                primera = o[np.r_[True, filas[o][1:] != filas[o][:-1]]] if o.size else o
+                # ...y, por flor, la posición más cercana entre las que la proponen
+                o = primera[np.lexsort((dist[primera], flores[primera]))]
+                f = flores[o]
+                gana = o[np.r_[True, f[1:] != f[:-1]]] if o.size else o
+                elegidas[filas[gana]] = flores[gana]
+                self.quitar(flores[gana])
+            pendientes = pendientes[elegidas[pendientes] == SIN_OBJETIVO]
+        self._reconstruir_si_hace_falta()
+        return elegidas
+
+    def _cotas(self, x, y, nivel, q):
+        """Distancia mínima y máxima de cada q a su bloque (x, y) del nivel"""
+        s = self.h * 2 ** nivel
+        x0, y0 = x * s, y * s
+        cerca = np.hypot(np.maximum(np.maximum(x0 - q[:, 0], q[:, 0] - x0 - s), 0),
+                         np.maximum(np.maximum(y0 - q[:, 1], q[:, 1] - y0 - s), 0))
+        lejos = np.hypot(np.maximum(q[:, 0] - x0, x0 + s - q[:, 0]),
+                         np.maximum(q[:, 1] - y0, y0 + s - q[:, 1]))
+        return cerca, lejos
+
+    @staticmethod
+    def _radio(g, lejos, cuenta, necesita):
+        """Por grupo, una distancia que seguro contiene sus `necesita` flores más cercanas:
+           la distancia máxima del bloque con el que los bloques más próximos ya juntan
+           suficientes flores (inf si no alcanzan). g viene ordenado"""
+        radio = np.full(len(necesita), np.inf)
+        if not len(g):
+            return radio
+        if (necesita[g] == 1).all():
+            # Caso común (una flor por grupo): el bloque no vacío más próximo
+            inicio = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+            radio[g[inicio]] = np.minimum.reduceat(np.where(cuenta > 0, lejos, np.inf), inicio)
+            return radio
+        # Ordenar por distancia dentro de cada grupo sin perder el orden de g
+        o = np.argsort(g + lejos / (2 * lejos.max() + 1))
+        g, lejos, cuenta = g[o], lejos[o], cuenta[o]
+        acumulado = np.cumsum(cuenta)
+        inicio = np.searchsorted(g, g)
+        acumulado -= acumulado[inicio] - cuenta[inicio]
+        alcanza = acumulado >= necesita[g]
+        np.minimum.at(radio, g[alcanza], lejos[alcanza])
+        return radio
+
+    def _descender(self, g, x, y, nivel, q, necesita):
+        """De bloques (x, y) del nivel dado a las flores libres candidatas de cada grupo g,
+           bajando solo por bloques no vacíos que puedan tener alguna de sus `necesita`
+           flores más cercanas. Devuelve (g, flor) con g repetido por flor"""
+        while True:
+            cuenta = self.niveles[nivel][y, x]
+            ok = cuenta > 0
+            g, x, y, cuenta = g[ok], x[ok], y[ok], cuenta[ok]
+            cerca, lejos = self._cotas(x, y, nivel, q[g])
+            ok = cerca <= self._radio(g, lejos, cuenta, necesita)[g]
+            g, x, y = g[ok], x[ok], y[ok]
+            if nivel == 0:
+                break
+            nivel -= 1
+            m = self.niveles[nivel].shape[0]
+            g = np.repeat(g, 4)
+            x = (2 * x[:, None] + _HIJOS_X).ravel()
+            y = (2 * y[:, None] + _HIJOS_Y).ravel()
+            ok = (x < m) & (y < m)
+            g, x, y = g[ok], x[ok], y[ok]
+        c = y * self.lado + x
+        total = self.libres[c]
+        desde = np.repeat(self.inicio[c], total)
+        salto = np.arange(total.sum()) - np.repeat(np.cumsum(total) - total, total)
+        return np.repeat(g, total), self.orden[desde + salto]
+
+    def _grupos(self, pos):
+        """Clave de grupo de cada posición para consultar juntas. Por defecto su celda; si el
+           vecindario 3x3 de su bloque del nivel L de la pirámide no tiene flores libres, la
+           flor más cercana está al menos a un bloque de distancia y las posiciones se agrupan
+           por bloque del nivel L - AGRUPAR_MARGEN (bloques menores que esa distancia).
+           Así un tropel de drones en una zona ya vaciada hace una sola consulta y se reparte
+           flores distintas, en lugar de disputarse las mismas en muchas rondas"""
+        ij = self._ij(pos)
+        vacio = np.full(len(pos), -1)
+        quienes = np.arange(len(pos))
+        # Si el vecindario está vacío en un nivel también lo está en los de abajo
+        for nivel, conteo in enumerate(self.niveles):
+            m = conteo.shape[0]
+            x = (ij[quienes, 0] >> nivel)[:, None] + _DX
+            y = (ij[quienes, 1] >> nivel)[:, None] + _DY
+            dentro = (x >= 0) & (x < m) & (y >= 0) & (y < m)
+            total = np.where(dentro, conteo[np.clip(y, 0, m - 1), np.clip(x, 0, m - 1)], 0).sum(axis=1)
+            quienes = quienes[total == 0]
+            if not quienes.size:
+                break
+            vacio[quienes] = nivel
+        nivel = np.maximum(vacio - AGRUPAR_MARGEN, 0)
+        return (nivel * self.lado + (ij[:, 1] >> nivel)) * self.lado + (ij[:, 0] >> nivel)
+
+    def _k_cercanas(self, pos, propuestas=1):
+        """Agrupa las posiciones (por celda o por bloque, ver _grupos) y busca las
+           g*propuestas flores libres más cercanas a cada grupo (g = tamaño del grupo) en el
+           vecindario 3x3 de su bloque,
+           subiendo de nivel en la pirámide (bloques el doble de grandes) hasta que el radio
+           que las contiene quede dentro del vecindario. El miembro k del grupo recibe las
+           flores de rango k, k+g, k+2g, ...
+           Devuelve (fila en pos, flor, distancia, turno) con turno = 0..propuestas-1"""
+        celda = self._grupos(pos)
+        orden = np.argsort(celda, kind="stable")
+        _, primera, tam = np.unique(celda[orden], return_index=True, return_counts=True)
+        lideres = orden[primera]                      # una posición representativa por grupo
+        q = pos[lideres]
+        ij = self._ij(q)
+        necesita = tam * propuestas
+        out_filas, out_flores, out_dist, out_turno = [], [], [], []
+        grupos = np.arange(len(lideres))
+        nivel = 0
+        while grupos.size:
+            m = self.niveles[nivel].shape[0]
+            s = self.h * 2 ** nivel
+            bi, bj = ij[grupos, 0] >> nivel, ij[grupos, 1] >> nivel
+            x, y = bi[:, None] + _DX, bj[:, None] + _DY
+            g, k = np.nonzero((x >= 0) & (x < m) & (y >= 0) & (y < m))
+            x, y = x[g, k], y[g, k]
+            cuenta = self.niveles[nivel][y, x]
+            _, lejos = self._cotas(x, y, nivel, q[grupos[g]])
+            radio = self._radio(g, lejos, cuenta, necesita[grupos])
+            # Distancia al exterior del vecindario (inf donde toca el borde de la grilla)
+            qx, qy = q[grupos, 0], q[grupos, 1]
+            borde = np.min([np.where(bi > 1, qx - (bi - 1) * s, np.inf),
+                            np.where(bi < m - 2, (bi + 2) * s - qx, np.inf),
+                            np.where(bj > 1, qy - (bj - 1) * s, np.inf),
+                            np.where(bj < m - 2, (bj + 2) * s - qy, np.inf)], axis=0)
+            listo = radio <= borde
+            sel = listo[g]
+            if sel.any():
+                g_l, f_l = self._descender(g[sel], x[sel], y[sel], nivel, q[grupos], necesita[grupos])
+                d_l = np.hypot(*(self.flores[f_l] - q[grupos[g_l]]).T)
+                o = np.lexsort((d_l, g_l))
+                g_l, f_l, d_l = g_l[o], f_l[o], d_l[o]
+                rango_en_grupo = np.arange(len(g_l)) - np.searchsorted(g_l, g_l)
+                toma = rango_en_grupo < necesita[grupos[g_l]]
+                g_l, f_l, d_l, k = g_l[toma], f_l[toma], d_l[toma], rango_en_grupo[toma]
+                # Rango k -> miembro k % g, en su turno k // g
+                g_tam = tam[grupos[g_l]]
+                out_filas.append(orden[primera[grupos[g_l]] + k % g_tam])
+                out_flores.append(f_l)
+                out_dist.append(d_l)
+                out_turno.append(k // g_tam)
+            grupos = grupos[~listo]
+            nivel += 1
+        if not out_filas:
+            vacio = np.zeros(0, dtype=np.intp)
+            return vacio, vacio, np.zeros(0), vacio
+        return (np.concatenate(out_filas), np.concatenate(out_flores), np.concatenate(out_dist),
+                np.concatenate(out_turno))
 
 # -------------------- INICIALIZACIÓN --------------------
-def inicializar_escenario():
-    flores = np.random.rand(NUM_FLORES, 2) * RANGO
-    madurez = np.random.rand(NUM_FLORES)
-    polinizadas = np.zeros(NUM_FLORES, dtype=bool)
-
-    tipos = ["obrera", "observadora", "exploradora"]
-    colores = {"obrera": "orange", "observadora": "cyan", "exploradora": "magenta"}
-    formas = {"obrera": "o", "observadora": "^", "exploradora": "s"}
-
-    drones = [{
-        "pos": BASE.copy(),
-        "tipo": random.choice(tipos),
-        "bateria": random.uniform(BATERIA_MAX * 0.5, BATERIA_MAX),
-        "objetivo": random.randint(0, NUM_FLORES - 1),
-        "estado": "buscando"
-    } for _ in range(NUM_DRONES)]
-
-    return flores, madurez, polinizadas, drones, colores, formas
-
-flores, madurez, polinizadas, drones, colores, formas = inicializar_escenario()
-inicio_tiempo = time.time()
-ciclo_actual = 1  # contador de ciclos
-
-# -------------------- CONFIGURAR FIGURA --------------------
-fig, ax = plt.subplots(figsize=(8, 8))
-ax.set_xlim(0, RANGO)
-ax.set_ylim(0, RANGO)
-ax.set_title("🐝 Simulación de Polinización con Enjambre de Abejas (2D)")
-
-# Base (panal)
-ax.plot(BASE[0], BASE[1], "s", color="brown", markersize=10, label="Panal")
-
-# Puntos de flores
-sc_flores = ax.scatter(flores[:, 0], flores[:, 1], c='green', s=30, label="Flores")
-
-# Drones
-sc_drones = ax.scatter([], [], c=[], s=60, marker="o")
-
-# Texto de información inferior
-texto_info = ax.text(0.02, -0.08, "", transform=ax.transAxes, fontsize=10, va='top')
-
-# Leyenda: Panal, Flores y roles de drones
-from matplotlib.lines import Line2D
-legend_elements = [
-    Line2D([0], [0], marker='s', color='w', markerfacecolor='brown', markersize=10, label='Panal'),
-    Line2D([0], [0], marker='o', color='w', markerfacecolor='green', markersize=8, label='Flor (no polinizada)'),
-    Line2D([0], [0], marker='o', color='w', markerfacecolor=colores['obrera'], markersize=8, label='Obrera'),
-    Line2D([0], [0], marker='o', color='w', markerfacecolor=colores['observadora'], markersize=8, label='Observadora'),
-    Line2D([0], [0], marker='o', color='w', markerfacecolor=colores['exploradora'], markersize=8, label='Exploradora')
-]
-ax.legend(handles=legend_elements, loc='upper right', fontsize=9, framealpha=0.9)
-
-# -------------------- FUNCIONES --------------------
-def actualizar_drones():
-    global polinizadas
-    for d in drones:
-        if d["estado"] == "recargando":
-            d["bateria"] += 1
-            if d["bateria"] >= BATERIA_MAX:
-                d["estado"] = "buscando"
-                d["objetivo"] = random.randint(0, NUM_FLORES - 1)
-            continue
-
-        if d["bateria"] <= 0:
-            d["estado"] = "regresando"
-            continue
-
-        objetivo = flores[d["objetivo"]]
-        direccion = objetivo - d["pos"]
-        distancia = np.linalg.norm(direccion)
-
-        if distancia < RADIO_POLINIZACION:
-            if not polinizadas[d["objetivo"]]:
-                polinizadas[d["objetivo"]] = True
-            d["objetivo"] = random.randint(0, NUM_FLORES - 1)
-
-        if d["estado"] in ["buscando", "explorando"]:
-            if distancia > 0:
-                d["pos"] += (direccion / distancia) * VELOCIDAD
-                d["bateria"] -= 1
-
-        if d["bateria"] < 10:
-            d["estado"] = "regresando"
-
-        if d["estado"] == "regresando":
-            dir_base = BASE - d["pos"]
-            dist_base = np.linalg.norm(dir_base)
-            if dist_base > 1:
-                d["pos"] += (dir_base / dist_base) * VELOCIDAD
-            else:
-                d["estado"] = "recargando"
-
-def fitness_global():
-    return np.sum(polinizadas) / NUM_FLORES
-
-def bateria_promedio():
-    return np.mean([d["bateria"] for d in drones])
-
-def reiniciar_simulacion():
-    global flores, madurez, polinizadas, drones, inicio_tiempo, ciclo_actual
-    flores, madurez, polinizadas, drones, _, _ = inicializar_escenario()
-    inicio_tiempo = time.time()
-    ciclo_actual += 1
-
-# -------------------- ACTUALIZACIÓN DE ANIMACIÓN --------------------
-def actualizar(frame):
-    global inicio_tiempo
-    actualizar_drones()
-    posiciones = np.array([d["pos"] for d in drones])
-    colores_drones = [colores[d["tipo"]] for d in drones]
-
-    sc_flores.set_facecolor(['yellow' if p else 'green' for p in polinizadas])
-    sc_drones.set_offsets(posiciones)
-    sc_drones.set_color(colores_drones)
-
-    # Estadísticas
-    tiempo_actual = time.time() - inicio_tiempo
-    flores_polinizadas = np.sum(polinizadas)
-    fit = fitness_global() * 100
-    bateria_avg = bateria_promedio()
-    estado_enjambre = "Completado" if flores_polinizadas == NUM_FLORES else "Polinizando"
-
-    texto_info.set_text(
-        f"🔁 Ciclo: {ciclo_actual}   ⏱ Tiempo: {tiempo_actual:.1f}s   🌸 Flores: {flores_polinizadas}/{NUM_FLORES}   "
-        f"🏋️ Fitness: {fit:.1f}%   🔋 Batería Promedio: {bateria_avg:.1f}%   🐝 Estado: {estado_enjambre}"
-    )
-
-    # Si termina, reinicia después de 3 segundos
-    if flores_polinizadas == NUM_FLORES:
-        plt.pause(3)
-        reiniciar_simulacion()
-
-    return sc_drones, sc_flores, texto_info
-
-# -------------------- ANIMACIÓN --------------------
-ani = animation.FuncAnimation(fig, actualizar, interval=INTERVALO_MS)
-plt.subplots_adjust(bottom=0.15)
-plt.show()
+class Enjambre:
+    """Estado del invernadero como arreglos (estructura de arreglos):
+       flores (F, 2), madurez (F,), polinizadas (F,) y, por drone, pos (N, 2), bateria (N,),
+       estado / rol (N,) como códigos y objetivo (N,) como índice de flor"""
+
+    def __init__(self, num_drones=NUM_DRONES, num_flores=NUM_FLORES, semilla=SEMILLA, objetivos=OBJETIVOS):
+        self.rng = np.random.default_rng(semilla)
+        self.flores = self.rng.random((num_flores, 2)) * RANGO
+        self.madurez = self.rng.random(num_flores)
+        self.polinizadas = np.zeros(num_flores, dtype=bool)
+
+        self.pos = np.tile(BASE, (num_drones, 1))
+        self.rol = self.rng.integers(len(TIPOS), size=num_drones).astype(np.int8)
+        self.bateria = self.rng.uniform(BATERIA_MAX * 0.5, BATERIA_MAX, num_drones)
+        self.estado = np.full(num_drones, BUSCANDO, dtype=np.int8)
+        # Índice espacial de flores libres (None: objetivos al azar)
+        self.indice = IndiceFlores(self.flores) if objetivos == "cercana" else None
+        # Contadores: distancia volada buscando y llegadas a flores ya polinizadas
+        self.vuelo = 0.0
+        self.llegadas_inutiles = 0
+        self.tick = 0             # reloj de la simulación (DT segundos simulados por tick)
+        self.objetivo = np.full(num_drones, SIN_OBJETIVO)
+        # Pedidos al índice que quedan en este tick (None: sin límite) y tick desde el que
+        # espera cada drone que se quedó sin cupo (los más antiguos piden primero)
+        self._cupo = None
+        self._espera = np.full(num_drones, -1)
+        self.nuevos_objetivos(np.arange(num_drones))
+
+    def nuevos_objetivos(self, drones):
+        """Asigna flor a cada drone de `drones` (índices): la libre más cercana (reservada)
+           o una al azar. Los que se quedan sin flor vuelven al panal a esperar (los que ya
+           están en el panal se quedan como estaban). Devuelve los drones que sí recibieron objetivo"""
+        if self.indice is None:
+            self.objetivo[drones] = self.rng.integers(len(self.flores), size=len(drones))
+            return drones
+        if self._cupo is not None:
+            # Los que exceden el cupo del tick quedan quietos sin objetivo y piden en el siguiente
+            sobran = drones[self._cupo:]
+            self.objetivo[sobran] = SIN_OBJETIVO
+            self._espera[sobran[self._espera[sobran] < 0]] = self.tick
+            drones = drones[:self._cupo]
+            self._cupo -= len(drones)
+            self._espera[drones] = -1
+        self.objetivo[drones] = self.indice.reservar_cercanas(self.pos[drones])
+        sin = drones[self.objetivo[drones] == SIN_OBJETIVO]
+        en_panal = np.isin(self.estado[sin], (RECARGANDO, ESPERANDO))
+        self.estado[sin] = np.where(en_panal, self.estado[sin], REGRESANDO)
+        return drones[self.objetivo[drones] != SIN_OBJETIVO]
+
+    def soltar_objetivos(self, drones):
+        """Los drones dejan su flor (vuelven al panal): la reserva vuelve al índice"""
+        if self.indice is None or not len(drones):
+            return
+        propios = self.objetivo[drones]
+        self.indice.devolver(propios[propios != SIN_OBJETIVO])
+        self.objetivo[drones] = SIN_OBJETIVO
+
+    def paso(self):
+        """Un paso de la máquina de estados, vectorizado sobre todo el enjambre.
+           Mismo orden que el bucle por drone: recarga, polinización, vuelo, regreso"""
+        estado, bateria, pos = self.estado, self.bateria, self.pos
+        self._cupo = OBJETIVOS_POR_TICK
+
+        # Recargando: +1 de batería hasta BATERIA_MAX; con la batería llena espera flor en
+        # el panal y, en cuanto hay una libre, vuelve a buscar
+        en_panal = (estado == RECARGANDO) | (estado == ESPERANDO)
+        recargando = np.flatnonzero(estado == RECARGANDO)
+        bateria[recargando] = np.minimum(bateria[recargando] + 1, BATERIA_MAX)
+        estado[recargando[bateria[recargando] >= BATERIA_MAX]] = ESPERANDO
+        esperando = np.flatnonzero(estado == ESPERANDO)
+        estado[self.nuevos_objetivos(esperando)] = BUSCANDO
+
+        # Sin batería: regresando (y quieto este paso)
+        agotados = np.flatnonzero(~en_panal & (bateria <= 0))
+        estado[agotados] = REGRESANDO
+        self.soltar_objetivos(agotados)
+        activos = np.flatnonzero(~en_panal & (bateria > 0) & (self.objetivo != SIN_OBJETIVO))
+
+        # Polinizar al llegar al objetivo y elegir otro (el vuelo de este paso sigue
+        # apuntando al objetivo anterior)
+        direccion = self.flores[self.objetivo[activos]] - pos[activos]
+        distancia = np.hypot(direccion[:, 0], direccion[:, 1])
+        llegaron = activos[distancia < RADIO_POLINIZACION]
+        flores = self.objetivo[llegaron]
+        self.llegadas_inutiles += int(np.count_nonzero(self.polinizadas[flores]))
+        self.polinizadas[flores] = True
+        if self.indice is not None:
+            self.indice.polinizar(flores)
+        # Primero los que se quedaron sin cupo en ticks anteriores, por antigüedad
+        rezagados = np.flatnonzero((estado == BUSCANDO) & (self.objetivo == SIN_OBJETIVO))
+        rezagados = rezagados[np.argsort(self._espera[rezagados], kind="stable")]
+        self.nuevos_objetivos(np.concatenate([rezagados, llegaron]))
+
+        # Buscando: avanzar hacia la flor gastando batería
+        mover = (estado[activos] == BUSCANDO) & (distancia > 0)
+        quienes = activos[mover]
+        pos[quienes] += direccion[mover] / distancia[mover, None] * VELOCIDAD
+        bateria[quienes] -= 1
+        self.vuelo += VELOCIDAD * len(quienes)
+        bajos = activos[(bateria[activos] < BATERIA_MINIMA) & (estado[activos] != REGRESANDO)]
+        estado[bajos] = REGRESANDO
+        self.soltar_objetivos(bajos)
+
+        # Regresando: volar al panal; al llegar, recargar
+        regresando = np.flatnonzero(estado == REGRESANDO)
+        dir_base = BASE - pos[regresando]
+        dist_base = np.hypot(dir_base[:, 0], dir_base[:, 1])
+        lejos = dist_base > 1
+        pos[regresando[lejos]] += dir_base[lejos] / dist_base[lejos, None] * VELOCIDAD
+        estado[regresando[~lejos]] = RECARGANDO
+        self.tick += 1
+
+    def run(self, n_ticks):
+        """Avanza n_ticks pasos. Devuelve el tick actual"""
+        for _ in range(n_ticks):
+            self.paso()
+        return self.tick
+
+    def run_until_complete(self, max_ticks=None):
+        """Avanza hasta polinizar todas las flores (o hasta max_ticks pasos más).
+           Devuelve True si el campo quedó completo"""
+        limite = None if max_ticks is None else self.tick + max_ticks
+        while not self.completo() and (limite is None or self.tick < limite):
+            self.paso()
+        return self.completo()
+
+    def completo(self):
+        return bool(self.polinizadas.all())
+
+    @property
+    def tiempo(self):
+        """Segundos simulados"""
+        return self.tick * DT
+
+    def fitness(self):
+        return self.polinizadas.mean()
+
+    def bateria_promedio(self):
+        return self.bateria.mean()
+
+    def resumen(self):
+        return {"ticks": self.tick, "tiempo_simulado": self.tiempo,
+                "flores_polinizadas": int(np.count_nonzero(self.polinizadas)),
+                "flores": len(self.flores), "fitness": float(self.fitness()),
+                "bateria_promedio": float(self.bateria_promedio()), "vuelo": self.vuelo,
+                "llegadas_inutiles": self.llegadas_inutiles}
+
+COLORES = {"obrera": "orange", "observadora": "cyan", "exploradora": "magenta"}
+FORMAS = {"obrera": "o", "observadora": "^", "exploradora": "s"}
+
+def inicializar_escenario(num_drones=NUM_DRONES, num_flores=NUM_FLORES, semilla=SEMILLA, objetivos=OBJETIVOS):
+    return Enjambre(num_drones, num_flores, semilla, objetivos), COLORES, FORMAS
+
+# -------------------- VISOR --------------------
+def mostrar(num_drones=NUM_DRONES, num_flores=NUM_FLORES, semilla=SEMILLA, objetivos=OBJETIVOS,
+            ticks_por_cuadro=TICKS_POR_CUADRO, intervalo_ms=INTERVALO_MS):
+    """Animación en vivo. Cada cuadro avanza ticks_por_cuadro ticks y dibuja el estado;
+       al completar el campo lo muestra PAUSA_FINAL segundos y reinicia (sin bloquear)"""
+    import matplotlib.pyplot as plt
+    import matplotlib.animation as animation
+    from matplotlib.colors import to_rgba
+    from matplotlib.lines import Line2D
+
+    # Color RGBA por código de rol y de flor (se indexan con los arreglos del enjambre)
+    colores_rol = np.array([to_rgba(COLORES[t]) for t in TIPOS])
+    colores_flor = np.array([to_rgba("green"), to_rgba("yellow")])
+    cuadros_pausa = max(1, round(PAUSA_FINAL * 1000 / intervalo_ms))
+    vista = {"enjambre": None, "ciclo": 0, "polinizadas": -1, "pausa": 0}
+
+    # -------------------- CONFIGURAR FIGURA --------------------
+    fig, ax = plt.subplots(figsize=(8, 8))
+    ax.set_xlim(0, RANGO)
+    ax.set_ylim(0, RANGO)
+    ax.set_title("🐝 Simulación de Polinización con Enjambre de Abejas (2D)")
+
+    # Base (panal)
+    ax.plot(BASE[0], BASE[1], "s", color="brown", markersize=10, label="Panal")
+
+    # Flores y drones (el color de un drone depende solo del rol: se fija al crear el enjambre)
+    sc_flores = ax.scatter([], [], c="green", s=30, label="Flores")
+    sc_drones = ax.scatter([], [], s=60, marker="o")
+
+    # Texto de información inferior
+    texto_info = ax.text(0.02, -0.08, "", transform=ax.transAxes, fontsize=10, va='top')
+
+    # Leyenda: Panal, Flores y roles de drones
+    legend_elements = [
+        Line2D([0], [0], marker='s', color='w', markerfacecolor='brown', markersize=10, label='Panal'),
+        Line2D([0], [0], marker='o', color='w', markerfacecolor='green', markersize=8, label='Flor (no polinizada)'),
+        Line2D([0], [0], marker='o', color='w', markerfacecolor=COLORES['obrera'], markersize=8, label='Obrera'),
+        Line2D([0], [0], marker='o', color='w', markerfacecolor=COLORES['observadora'], markersize=8, label='Observadora'),
+        Line2D([0], [0], marker='o', color='w', markerfacecolor=COLORES['exploradora'], markersize=8, label='Exploradora')
+    ]
+    ax.legend(handles=legend_elements, loc='upper right', fontsize=9, framealpha=0.9)
+
+    def reiniciar_simulacion():
+        enjambre, _, _ = inicializar_escenario(num_drones, num_flores, semilla, objetivos)
+        sc_flores.set_offsets(enjambre.flores)
+        sc_drones.set_offsets(enjambre.pos)
+        sc_drones.set_color(colores_rol[enjambre.rol])
+        vista.update(enjambre=enjambre, polinizadas=-1, pausa=0)
+        vista["ciclo"] += 1
+
+    # -------------------- ACTUALIZACIÓN DE ANIMACIÓN --------------------
+    def actualizar(frame):
+        enjambre = vista["enjambre"]
+        if enjambre.completo():
+            # Campo completo: se sigue mostrando unos cuadros y luego se reinicia
+            vista["pausa"] += 1
+            if vista["pausa"] >= cuadros_pausa:
+                reiniciar_simulacion()
+                enjambre = vista["enjambre"]
+        else:
+            enjambre.run(ticks_por_cuadro)
+        sc_drones.set_offsets(enjambre.pos)
+
+        # Estadísticas (los colores de las flores solo se recalculan si cambió el conteo)
+        num_flores_total = len(enjambre.flores)
+        flores_polinizadas = int(np.count_nonzero(enjambre.polinizadas))
+        if flores_polinizadas != vista["polinizadas"]:
+            sc_flores.set_facecolor(colores_flor[enjambre.polinizadas.view(np.int8)])
+            vista["polinizadas"] = flores_polinizadas
+        fit = enjambre.fitness() * 100
+        bateria_avg = enjambre.bateria_promedio()
+        estado_enjambre = "Completado" if flores_polinizadas == num_flores_total else "Polinizando"
+
+        texto_info.set_text(
+            f"🔁 Ciclo: {vista['ciclo']}   ⏱ Tiempo: {enjambre.tiempo:.1f}s   🌸 Flores: {flores_polinizadas}/{num_flores_total}   "
+            f"🏋️ Fitness: {fit:.1f}%   🔋 Batería Promedio: {bateria_avg:.1f}%   🐝 Estado: {estado_enjambre}"
+        )
+        return sc_drones, sc_flores, texto_info
+
+    reiniciar_simulacion()
+
+    # -------------------- ANIMACIÓN --------------------
+    ani = animation.FuncAnimation(fig, actualizar, interval=intervalo_ms, cache_frame_data=False)
+    fig.anim = ani      # referencia persistente para que no la recolecte el GC
+    plt.subplots_adjust(bottom=0.15)
+    plt.show()
+    return ani
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Polinización con enjambre de abejas")
+    parser.add_argument("--drones", type=int, default=NUM_DRONES)
+    parser.add_argument("--flores", type=int, default=NUM_FLORES)
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    parser.add_argument("--objetivos", choices=["cercana", "azar"], default=OBJETIVOS,
+                        help="cercana: menos ticks, hasta OBJETIVOS_POR_TICK pedidos al índice "
+                             "por tick; azar: ticks baratos")
+    parser.add_argument("--ticks-por-cuadro", type=int, default=TICKS_POR_CUADRO,
+                        help="ticks de simulación entre cuadros del visor")
+    parser.add_argument("--intervalo", type=int, default=INTERVALO_MS, help="ms entre cuadros del visor")
+    parser.add_argument("--sin-visor", action="store_true",
+                        help="correr hasta completar el campo sin gráficos e imprimir el resumen")
+    parser.add_argument("--max-ticks", type=int, default=None, help="límite de ticks con --sin-visor")
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.sin_visor:
+        enjambre, _, _ = inicializar_escenario(args.drones, args.flores, args.semilla, args.objetivos)
+        t0 = time.perf_counter()
+        enjambre.run_until_complete(args.max_ticks)
+        segundos = time.perf_counter() - t0
+        resumen = enjambre.resumen()
+        print(f"{'Completado' if enjambre.completo() else 'Incompleto'}: "
+              f"{resumen['flores_polinizadas']}/{resumen['flores']} flores en {resumen['ticks']} ticks "
+              f"({resumen['tiempo_simulado']:.1f}s simulados, {segundos:.2f}s de reloj, "
+              f"{resumen['ticks'] / max(segundos, 1e-9):.0f} ticks/s)")
+        print(f"Vuelo total: {resumen['vuelo']:.0f}   Llegadas a flores ya polinizadas: {resumen['llegadas_inutiles']}")
+        sys.exit(0)
+    mostrar(args.drones, args.flores, args.semilla, args.objetivos, args.ticks_por_cuadro, args.intervalo)
@@ -0,0 +1,54 @@
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import pytest
+
+import Abejas
+
+@pytest.mark.parametrize("objetivos", ["cercana", "azar"])
+def test_bateria_acotada_con_mas_drones_que_flores(objetivos):
+    enjambre = Abejas.Enjambre(200, 50, semilla=0, objetivos=objetivos)
+    for _ in range(500):
+        enjambre.paso()
+        assert enjambre.bateria.max() <= Abejas.BATERIA_MAX
+    assert not np.any((enjambre.estado == Abejas.RECARGANDO) & (enjambre.bateria >= Abejas.BATERIA_MAX))
+
+def test_consultas_acotadas_con_tropeles(monkeypatch):
+    # Muchos drones saliendo juntos del panal: cada tick miles piden flor en zonas ya
+    # vaciadas. El trabajo del índice (bloques de la pirámide evaluados) por pedido debe
+    # quedar acotado en vez de crecer con los drones que se disputan las mismas flores
+    enjambre = Abejas.Enjambre(10_000, 100_000, semilla=0)
+    cuenta = {"pedidos": 0, "bloques": 0}
+    reservar, cotas = Abejas.IndiceFlores.reservar_cercanas, Abejas.IndiceFlores._cotas
+    def contar_pedidos(self, pos):
+        cuenta["pedidos"] += len(pos)
+        return reservar(self, pos)
+    def contar_bloques(self, x, y, nivel, q):
+        cuenta["bloques"] += len(x)
+        return cotas(self, x, y, nivel, q)
+    monkeypatch.setattr(Abejas.IndiceFlores, "reservar_cercanas", contar_pedidos)
+    monkeypatch.setattr(Abejas.IndiceFlores, "_cotas", contar_bloques)
+    enjambre.run(20)
+    assert cuenta["bloques"] / cuenta["pedidos"] < 80
+    # Cada flor reservada es de un solo drone y sigue sin polinizar
+    objetivos = enjambre.objetivo[enjambre.objetivo != Abejas.SIN_OBJETIVO]
+    assert len(np.unique(objetivos)) == len(objetivos)
+    assert not enjambre.polinizadas[objetivos].any()
+
+def test_pedidos_por_tick_acotados(monkeypatch):
+    # Con más drones pidiendo flor que el cupo, el índice nunca atiende más de
+    # OBJETIVOS_POR_TICK por tick y los que esperan terminan recibiendo flor
+    monkeypatch.setattr(Abejas, "OBJETIVOS_POR_TICK", 50)
+    enjambre = Abejas.Enjambre(500, 5_000, semilla=0)
+    pedidos = []
+    reservar = Abejas.IndiceFlores.reservar_cercanas
+    def contar_pedidos(self, pos):
+        pedidos[-1] += len(pos)
+        return reservar(self, pos)
+    monkeypatch.setattr(Abejas.IndiceFlores, "reservar_cercanas", contar_pedidos)
+    while not enjambre.completo():
+        pedidos.append(0)
+        enjambre.paso()
+        assert pedidos[-1] <= 50
+        assert enjambre.tick < 2_000
+    assert max(pedidos) == 50